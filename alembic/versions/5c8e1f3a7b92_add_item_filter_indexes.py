@@ -0,0 +1,47 @@
+"""Add item filter indexes
+
+Revision ID: 5c8e1f3a7b92
+Revises: e2a9c4f7b813
+Create Date: 2026-10-18 16:34:09.271845
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5c8e1f3a7b92"
+down_revision: Union[str, None] = "e2a9c4f7b813"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_items_cc_horsepower_price", ["cc", "horsepower", "price"]),
+    ("ix_items_horsepower_id", ["horsepower", "id"]),
+    ("ix_items_price_id", ["price", "id"]),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(
+                name,
+                "items",
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name="items",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,63 @@
+"""Add lookup indexes
+
+Revision ID: c71f0a9d4e26
+Revises: 8c4d2e71b0a5
+Create Date: 2026-10-18 11:02:17.508331
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c71f0a9d4e26"
+down_revision: Union[str, None] = "8c4d2e71b0a5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (имя, таблица, колонки, условие частичного индекса)
+INDEXES = [
+    ("ix_orders_tg_id", "orders", ["tg_id"], None),
+    ("ix_orders_tg_id_paid", "orders", ["tg_id"], "is_paid"),
+    ("ix_payment_tg_id", "payment", ["tg_id"], None),
+    ("ix_payment_tg_id_confirmed", "payment", ["tg_id"], "confirmed"),
+    ("ix_catalog_manufacturer_id", "catalog", ["manufacturer", "id"], None),
+    ("ix_catalog_in_stock_id", "catalog", ["id"], "quantity > 0"),
+    (
+        "ix_catalog_manufacturer_in_stock_id",
+        "catalog",
+        ["manufacturer", "id"],
+        "quantity > 0",
+    ),
+    ("ix_items_model_id", "items", ["model", "id"], None),
+    ("ix_items_model_price_id", "items", ["model", "price", "id"], None),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY не блокирует запись в таблицы, но не работает
+    # внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
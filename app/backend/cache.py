@@ -0,0 +1,176 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi.requests import Request
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+AUTH_STATES = ("anon", "auth")
+
+
+class LocalCache:
+    """
+    LRU-кэш страниц в памяти процесса.
+
+    Для каждой страницы хранятся варианты, отличающиеся строкой запроса
+    (курсор, сортировка). Время жизни отсчитывается от первой записи
+    страницы, поэтому инвалидация и истечение срока удаляют все варианты.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, max_variants: int = 256):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_variants = max_variants
+        self._data: OrderedDict[str, tuple[float, dict[str, bytes]]] = (
+            OrderedDict()
+        )
+
+    def _variants(self, page: str) -> Optional[dict[str, bytes]]:
+        entry = self._data.get(page)
+        if entry is None:
+            return None
+        expires, variants = entry
+        if expires < time.monotonic():
+            del self._data[page]
+            return None
+        self._data.move_to_end(page)
+        return variants
+
+    def get(self, page: str, variant: str) -> Optional[bytes]:
+        variants = self._variants(page)
+        if variants is None:
+            return None
+        return variants.get(variant)
+
+    def set(self, page: str, variant: str, value: bytes) -> None:
+        variants = self._variants(page)
+        if variants is None:
+            variants = {}
+            self._data[page] = (time.monotonic() + self.ttl, variants)
+        variants[variant] = value
+        if len(variants) > self.max_variants:
+            del variants[next(iter(variants))]
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, *pages: str) -> None:
+        for page in pages:
+            self._data.pop(page, None)
+
+
+class RedisCache:
+    """Общий для всех воркеров уровень кэша: по хешу Redis на страницу."""
+
+    def __init__(self, url: str, ttl: int, prefix: str = "page:"):
+        from redis import asyncio as aioredis
+
+        self.ttl = ttl
+        self.prefix = prefix
+        self._redis = aioredis.from_url(url)
+
+    async def get(self, page: str, variant: str) -> Optional[bytes]:
+        try:
+            return await self._redis.hget(self.prefix + page, variant)
+        except Exception:
+            logger.warning("Shared page cache is unavailable", exc_info=True)
+            return None
+
+    async def set(self, page: str, variant: str, value: bytes) -> None:
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.hset(self.prefix + page, variant, value)
+                pipe.expire(self.prefix + page, self.ttl, nx=True)
+                await pipe.execute()
+        except Exception:
+            logger.warning("Shared page cache is unavailable", exc_info=True)
+
+    async def delete(self, *pages: str) -> None:
+        try:
+            await self._redis.delete(*(self.prefix + page for page in pages))
+        except Exception:
+            logger.warning("Shared page cache is unavailable", exc_info=True)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+class PageCache:
+    """
+    Кэш отрисованных страниц каталога.
+
+    Сначала проверяется кэш процесса, затем общий уровень (если настроен).
+    При наличии общего уровня записи в памяти живут недолго, чтобы
+    инвалидация с другого воркера применялась быстро.
+    """
+
+    def __init__(self, local: LocalCache, shared: Optional[RedisCache] = None):
+        self.local = local
+        self.shared = shared
+
+    async def get(self, key: tuple[str, str]) -> Optional[bytes]:
+        body = self.local.get(*key)
+        if body is None and self.shared is not None:
+            body = await self.shared.get(*key)
+            if body is not None:
+                self.local.set(*key, body)
+        return body
+
+    async def set(self, key: tuple[str, str], body: bytes) -> None:
+        self.local.set(*key, body)
+        if self.shared is not None:
+            await self.shared.set(*key, body)
+
+    async def invalidate(self, *pages: tuple[str, ...]) -> None:
+        """
+        Удаляет страницы со всеми вариантами и состояниями авторизации.
+
+        Каждая страница задаётся кортежем (маршрут, *параметры пути).
+        """
+        keys = [
+            make_page(route, *params, auth=auth)
+            for route, *params in pages
+            for auth in AUTH_STATES
+        ]
+        self.local.delete(*keys)
+        if self.shared is not None:
+            await self.shared.delete(*keys)
+
+    async def close(self) -> None:
+        if self.shared is not None:
+            await self.shared.close()
+
+
+def make_page(route: str, *params: str, auth: str) -> str:
+    return ":".join((route, *params, auth))
+
+
+def page_key(request: Request, route: str, *params: str) -> tuple[str, str]:
+    """
+    Ключ страницы: маршрут, параметры пути и состояние авторизации,
+    а также версия каталога и строка запроса как вариант страницы.
+
+    С версией в ключе другие воркеры не отдают страницу, устаревшую
+    относительно ETag, даже до истечения срока локального кэша.
+    """
+    user = getattr(request.state, "user", None)
+    page = make_page(route, *params, auth=AUTH_STATES[user is not None])
+    version = getattr(request.state, "catalog_version", None)
+    return page, f"{version}:{request.url.query}"
+
+
+def create_page_cache() -> PageCache:
+    if settings.cache_redis_url:
+        return PageCache(
+            LocalCache(settings.page_cache_size, settings.page_cache_local_ttl),
+            RedisCache(settings.cache_redis_url, settings.page_cache_ttl),
+        )
+    return PageCache(
+        LocalCache(settings.page_cache_size, settings.page_cache_ttl)
+    )
+
+
+page_cache = create_page_cache()
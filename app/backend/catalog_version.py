@@ -0,0 +1,204 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from sqlalchemy import select
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..config import settings
+from ..models import CatalogVersion
+from .cache import AUTH_STATES
+from .config import AsyncSessionLocal, async_engine
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "catalog_version"
+SAFE_METHODS = ("GET", "HEAD")
+
+
+class CatalogVersionWatcher:
+    """
+    Версия каталога в памяти процесса.
+
+    Версию увеличивает триггер при COMMIT транзакции, изменившей
+    марки, модели или мотоциклы (один раз на транзакцию), и сообщает о
+    ней через NOTIFY. За PgBouncer LISTEN не
+    работает, тогда версия перечитывается раз в interval секунд. Пока
+    версия неизвестна, условные запросы не обрабатываются.
+    """
+
+    def __init__(self, interval: float, listen: bool = True):
+        self.interval = interval
+        self.listen = listen
+        self.version: Optional[int] = None
+        self.modified: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def update(self, version: int, modified: datetime) -> None:
+        # Уведомления и сверка могут прийти в любом порядке
+        if self.version is None or version > self.version:
+            if modified.tzinfo is None:
+                modified = modified.replace(tzinfo=timezone.utc)
+            self.version = version
+            self.modified = modified.astimezone(timezone.utc)
+
+    async def refresh(self) -> Optional[int]:
+        async with AsyncSessionLocal() as session:
+            row = (
+                await session.execute(
+                    select(CatalogVersion.version, CatalogVersion.updated_at)
+                    .where(CatalogVersion.id == 1)
+                )
+            ).one_or_none()
+        if row is not None:
+            self.update(*row)
+        return self.version
+
+    def _notified(self, connection, pid, channel, payload: str) -> None:
+        version, epoch = payload.split()
+        self.update(
+            int(version), datetime.fromtimestamp(float(epoch), timezone.utc)
+        )
+
+    async def _watch(self) -> None:
+        if not self.listen:
+            while True:
+                await self.refresh()
+                await asyncio.sleep(self.interval)
+
+        async with async_engine.connect() as conn:
+            raw = (await conn.get_raw_connection()).driver_connection
+            await raw.add_listener(CHANNEL, self._notified)
+            try:
+                while not raw.is_closed():
+                    # Сверка после подписки и на случай потерянных уведомлений
+                    await self.refresh()
+                    await asyncio.sleep(self.interval)
+            finally:
+                if not raw.is_closed():
+                    await raw.remove_listener(CHANNEL, self._notified)
+        raise ConnectionError("Catalog version listener connection closed")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._watch()
+            except Exception:
+                logger.exception("Catalog version watcher failed")
+                self.version = None
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+class CatalogETagMiddleware:
+    """
+    Условные запросы к страницам и API каталога и мотоциклов.
+
+    ETag и Last-Modified строятся из версии каталога и состояния
+    авторизации, поэтому 304 отдаётся без запросов к базе и отрисовки
+    шаблона. Версия кладётся в request.state.catalog_version и входит в
+    ключ кэша страниц. После изменений через API версия перечитывается
+    сразу, не дожидаясь уведомления.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        watcher: CatalogVersionWatcher,
+        prefixes: tuple = (
+            "/catalog",
+            "/items",
+            "/api/v1/catalog",
+            "/api/v1/items",
+        ),
+    ):
+        self.app = app
+        self.watcher = watcher
+        self.prefixes = prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not scope["path"].startswith(
+            self.prefixes
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] not in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            try:
+                await self.watcher.refresh()
+            except Exception:
+                logger.warning("Catalog version refresh failed", exc_info=True)
+            return
+
+        version, modified = self.watcher.version, self.watcher.modified
+        if version is None:
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+        state["catalog_version"] = version
+        auth = AUTH_STATES[state.get("user") is not None]
+        etag = f'W/"{version}-{auth}"'
+        headers = {
+            "ETag": etag,
+            "Last-Modified": format_datetime(modified, usegmt=True),
+            "Cache-Control": "no-cache",
+            "Vary": "Cookie",
+        }
+        if self.is_not_modified(Headers(scope=scope), etag, modified):
+            response = Response(status_code=304, headers=headers)
+            await response(scope, receive, send)
+            return
+
+        async def send_with_etag(message: Message) -> None:
+            if (
+                message["type"] == "http.response.start"
+                and message["status"] == 200
+            ):
+                MutableHeaders(scope=message).update(headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
+
+    @staticmethod
+    def is_not_modified(
+        request_headers: Headers, etag: str, modified: datetime
+    ) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            # Слабое сравнение: префикс W/ не учитывается
+            tags = {
+                tag.strip().removeprefix("W/")
+                for tag in if_none_match.split(",")
+            }
+            return "*" in tags or etag.removeprefix("W/") in tags
+
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since is None:
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return modified.replace(microsecond=0) <= since
+
+
+catalog_version = CatalogVersionWatcher(
+    settings.catalog_version_interval, listen=not settings.db_pgbouncer
+)
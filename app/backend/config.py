@@ -1,8 +1,13 @@
+from uuid import uuid4
+
 from sqlalchemy import Column, Integer
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, declared_attr, sessionmaker
 
 from ..config import settings
+from .pool import InstrumentedPool
+from .sqlstats import instrument_engine
+
 DATABASE_URL = (
     f"postgresql+asyncpg://{settings.POSTGRES_USER}:"
     f"{settings.POSTGRES_PASSWORD}@"
@@ -10,12 +15,47 @@ DATABASE_URL = (
     f"{settings.POSTGRES_DB}"
 )
 
-async_engine = create_async_engine(DATABASE_URL, echo=False)
+
+def connect_args() -> dict:
+    """
+    Параметры asyncpg.
+
+    За PgBouncer в режиме transaction соседние транзакции одного
+    соединения попадают на разные серверные соединения, поэтому
+    именованные подготовленные запросы и их кэши отключаются, а имена
+    делаются уникальными, чтобы не столкнуться с чужими.
+    """
+    if settings.db_pgbouncer:
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {"statement_cache_size": settings.db_statement_cache_size}
+
+
+async_engine = create_async_engine(
+    DATABASE_URL,
+    echo=False,
+    poolclass=InstrumentedPool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    connect_args=connect_args(),
+)
+instrument_engine(async_engine.sync_engine)
 AsyncSessionLocal = sessionmaker(
     bind=async_engine, class_=AsyncSession, expire_on_commit=False
 )
 
 
+def read_session() -> AsyncSession:
+    """Сессия для чтения списков: без autoflush, только SELECT."""
+    return AsyncSessionLocal(autoflush=False)
+
+
 class PreBase:
 
     @declared_attr
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from ..config import settings
+
+bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordHasher:
+    """
+    Хеширование и проверка паролей в ограниченном пуле потоков.
+
+    bcrypt отпускает GIL, поэтому потоков достаточно, чтобы не блокировать
+    цикл событий. Если в очереди уже max_queue задач, новые отклоняются
+    с 503, а не копятся бесконечно.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bcrypt"
+        )
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    @property
+    def queued(self) -> int:
+        return max(self.in_flight - self.workers, 0)
+
+    async def _run(self, func, *args):
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Сервер перегружен. Попробуйте позже.",
+                headers={"Retry-After": "1"},
+            )
+
+        def job():
+            started = time.perf_counter()
+            return started, func(*args), time.perf_counter() - started
+
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        self.in_flight += 1
+        try:
+            started, result, elapsed = await loop.run_in_executor(
+                self._executor, job
+            )
+        finally:
+            self.in_flight -= 1
+        self.completed += 1
+        self.wait_seconds += started - submitted
+        self.run_seconds += elapsed
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(bcrypt_context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(
+            bcrypt_context.verify, password, hashed_password
+        )
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_seconds_total": self.wait_seconds,
+            "run_seconds_total": self.run_seconds,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    settings.password_hash_workers, settings.password_hash_queue
+)
@@ -0,0 +1,75 @@
+import hashlib
+import io
+import os
+from typing import Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+THUMBNAILS_URL = "/static/thumbs"
+# Карточки показывают фото 200x150, второй размер — для экранов 2x
+THUMBNAIL_SIZES = ((200, 150), (400, 300))
+THUMBNAIL_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def thumbnail_path(digest: str, width: int, ext: str) -> str:
+    return f"{digest[:2]}/{digest}-{width}.{ext}"
+
+
+def thumbnail_url(digest: str, width: int, ext: str) -> str:
+    return f"{THUMBNAILS_URL}/{thumbnail_path(digest, width, ext)}"
+
+
+def thumbnail_srcset(digest: str, ext: str) -> str:
+    base = THUMBNAIL_SIZES[0][0]
+    return ", ".join(
+        f"{thumbnail_url(digest, width, ext)} {width // base}x"
+        for width, _ in THUMBNAIL_SIZES
+    )
+
+
+def build_thumbnails(source: str, target_dir: str) -> Optional[str]:
+    """
+    Строит миниатюры всех размеров и форматов, возвращает хеш исходника.
+
+    Файлы называются по хешу содержимого, поэтому одинаковые фотографии
+    обрабатываются один раз, а готовые миниатюры не перестраиваются.
+    None — исходника ещё нет, пустая строка — это не изображение.
+    Выполняется в отдельном процессе.
+    """
+    try:
+        with open(source, "rb") as file:
+            data = file.read()
+    except FileNotFoundError:
+        return None
+    digest = hashlib.sha256(data).hexdigest()[:32]
+
+    missing = [
+        (size, ext)
+        for size in THUMBNAIL_SIZES
+        for ext in THUMBNAIL_FORMATS
+        if not os.path.exists(
+            os.path.join(target_dir, thumbnail_path(digest, size[0], ext))
+        )
+    ]
+    if not missing:
+        return digest
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image).convert("RGB")
+    except (UnidentifiedImageError, OSError):
+        return ""
+
+    for size, ext in missing:
+        path = os.path.join(target_dir, thumbnail_path(digest, size[0], ext))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        image_format, options = THUMBNAIL_FORMATS[ext]
+        thumbnail = ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+        # Запись через временный файл: читатель не увидит половину файла
+        tmp = f"{path}.{os.getpid()}.tmp"
+        thumbnail.save(tmp, image_format, **options)
+        os.replace(tmp, path)
+    return digest
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import QueuePool
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..config import settings
+from .cache import page_cache
+from .catalog_version import catalog_version
+from .config import async_engine
+from .hashing import password_hasher
+from .metrics import exporter
+from .photos import photo_indexer
+from .static import assets
+from .telegram import bot, outbox
+from .templates import stream_env, templates
+from .thumbnails import thumbnail_indexer
+
+logger = logging.getLogger(__name__)
+
+
+class InFlightRequests:
+    """Счётчик запросов в обработке, чтобы дождаться их при остановке."""
+
+    def __init__(self):
+        self.count = 0
+        self.draining = False
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def started(self) -> None:
+        self.count += 1
+        self._idle.clear()
+
+    def finished(self) -> None:
+        self.count -= 1
+        if not self.count:
+            self._idle.set()
+
+    async def wait_idle(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+class InFlightMiddleware:
+    """
+    Считает HTTP-запросы, включая отправку потокового тела ответа.
+
+    Во время остановки новые запросы получают 503, чтобы балансировщик
+    перевёл их на другой экземпляр.
+    """
+
+    def __init__(self, app: ASGIApp, tracker: InFlightRequests):
+        self.app = app
+        self.tracker = tracker
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self.tracker.draining:
+            response = PlainTextResponse(
+                "Service is shutting down",
+                status_code=503,
+                headers={"Connection": "close", "Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.tracker.started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.tracker.finished()
+
+
+async def wait_for_database(engine: AsyncEngine, timeout: float) -> None:
+    """Проверяет доступность базы, повторяя попытки до timeout секунд."""
+    deadline = time.monotonic() + timeout
+    delay = 0.5
+    while True:
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            return
+        except Exception:
+            if time.monotonic() + delay > deadline:
+                raise
+            logger.warning(
+                "Database is not reachable, retrying in %.1fs", delay
+            )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 5)
+
+
+async def warm_up_pool(engine: AsyncEngine, connections: int) -> int:
+    """
+    Открывает соединения пула заранее.
+
+    Соединения берутся одновременно, иначе пул вернёт одно и то же.
+    Больше размера пула открывать бессмысленно: лишние закроются сразу.
+    """
+    if isinstance(engine.pool, QueuePool):
+        connections = min(connections, engine.pool.size())
+
+    async def checkout(stack: AsyncExitStack) -> None:
+        conn = await stack.enter_async_context(engine.connect())
+        await conn.execute(text("SELECT 1"))
+
+    async with AsyncExitStack() as stack:
+        await asyncio.gather(*(checkout(stack) for _ in range(connections)))
+    return connections
+
+
+def compile_templates() -> int:
+    """Компилирует все шаблоны в обоих окружениях Jinja2 заранее."""
+    names = templates.env.list_templates(extensions=["html"])
+    for name in names:
+        templates.env.get_template(name)
+        stream_env.get_template(name)
+    return len(names)
+
+
+in_flight = InFlightRequests()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    await wait_for_database(async_engine, settings.db_startup_timeout)
+    connections = await warm_up_pool(
+        async_engine, settings.db_warmup_connections
+    )
+    compiled = compile_templates()
+    static_files = await asyncio.to_thread(assets.build)
+    await catalog_version.start()
+    await exporter.start()
+    await outbox.start()
+    await photo_indexer.start()
+    await thumbnail_indexer.start()
+    logger.info(
+        "Ready in %.2fs: %d database connections, %d templates, "
+        "%d static files",
+        time.perf_counter() - started,
+        connections,
+        compiled,
+        static_files,
+    )
+    try:
+        yield
+    finally:
+        in_flight.draining = True
+        if not await in_flight.wait_idle(settings.shutdown_drain_timeout):
+            logger.warning(
+                "Shutting down with %d requests in flight", in_flight.count
+            )
+        await photo_indexer.stop()
+        await thumbnail_indexer.stop()
+        await catalog_version.stop()
+        await exporter.stop()
+        await outbox.stop()
+        await bot.session.close()
+        await page_cache.close()
+        await asyncio.to_thread(password_hasher.shutdown)
+        await async_engine.dispose()
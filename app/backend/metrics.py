@@ -0,0 +1,424 @@
+import asyncio
+import bisect
+import fcntl
+import json
+import logging
+import math
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Histogram:
+    """
+    Семейство гистограмм с метками.
+
+    Серия — список счётчиков по корзинам (последняя — +Inf) и сумма в
+    конце. Запись — bisect и два сложения без блокировок: метрики
+    пишутся только из цикла событий своего воркера.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple = (),
+        buckets: tuple = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def collect(self) -> dict:
+        return histogram_family(
+            self.name,
+            self.help,
+            self.labels,
+            self.buckets,
+            [[list(key), list(value)] for key, value in self.series.items()],
+        )
+
+
+def histogram_family(
+    name: str, help: str, labels: tuple, buckets: tuple, samples: list
+) -> dict:
+    return {
+        "name": name,
+        "type": "histogram",
+        "help": help,
+        "labels": list(labels),
+        "buckets": list(buckets),
+        "samples": samples,
+    }
+
+
+def value_family(name: str, type: str, help: str, value: float) -> dict:
+    """Счётчик или gauge без меток."""
+    return {
+        "name": name,
+        "type": type,
+        "help": help,
+        "labels": [],
+        "samples": [[[], value]],
+    }
+
+
+class MetricsRegistry:
+    """
+    Метрики одного воркера.
+
+    Гистограммы пишутся по ходу работы, остальные значения (пул,
+    очереди, счётчики компонентов) снимают collectors в момент сбора.
+    """
+
+    def __init__(self):
+        self.histograms: list[Histogram] = []
+        self.collectors: list[Callable[[], list[dict]]] = []
+
+    def histogram(self, name: str, help: str, **kwargs) -> Histogram:
+        histogram = Histogram(name, help, **kwargs)
+        self.histograms.append(histogram)
+        return histogram
+
+    def collector(self, func: Callable[[], list[dict]]):
+        self.collectors.append(func)
+        return func
+
+    def collect(self) -> list[dict]:
+        families = [histogram.collect() for histogram in self.histograms]
+        for collector in self.collectors:
+            families.extend(collector())
+        return families
+
+
+def merge(snapshots: list[tuple[list[dict], bool]]) -> list[dict]:
+    """
+    Сложить метрики воркеров.
+
+    Счётчики и гистограммы суммируются по всем снимкам, в том числе
+    завершившихся воркеров, чтобы итоги не уменьшались. Gauge берутся
+    только из свежих снимков: значения мёртвого воркера устарели.
+    """
+    merged: dict[str, dict] = {}
+    for families, fresh in snapshots:
+        for family in families:
+            if family["type"] == "gauge" and not fresh:
+                continue
+            target = merged.setdefault(
+                family["name"], {**family, "samples": {}}
+            )
+            for labels, value in family["samples"]:
+                key = tuple(labels)
+                current = target["samples"].get(key)
+                if current is None:
+                    target["samples"][key] = value
+                elif isinstance(value, list):
+                    target["samples"][key] = [
+                        a + b for a, b in zip(current, value)
+                    ]
+                else:
+                    target["samples"][key] = current + value
+    for family in merged.values():
+        family["samples"] = [
+            [list(key), value] for key, value in family["samples"].items()
+        ]
+    return list(merged.values())
+
+
+def _escape(value) -> str:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def _labels(names: list, values: list, extra: str = "") -> str:
+    pairs = [
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(families: list[dict]) -> str:
+    """Текстовый формат Prometheus 0.0.4."""
+    lines = []
+    for family in families:
+        name = family["name"]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        names = family["labels"]
+        for values, sample in family["samples"]:
+            if family["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, values)} {sample}")
+                continue
+            total = 0
+            bounds = (*family["buckets"], math.inf)
+            for bound, count in zip(bounds, sample):
+                total += count
+                le = f'le="{_number(bound)}"'
+                lines.append(
+                    f"{name}_bucket{_labels(names, values, le)} {total}"
+                )
+            lines.append(f"{name}_sum{_labels(names, values)} {sample[-1]}")
+            lines.append(f"{name}_count{_labels(names, values)} {total}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """
+    Сбор метрик для /metrics с учётом нескольких воркеров uvicorn.
+
+    Без directory отдаются метрики текущего процесса. С directory
+    каждый воркер раз в interval секунд записывает свой снимок в
+    worker-<pid>-<случайный ключ>.json (pid после перезапуска может
+    достаться новому воркеру), а воркер, принявший запрос, дописывает
+    свежий снимок и складывает все файлы каталога. Снимок старше трёх
+    интервалов считается снимком завершившегося воркера: его gauge не
+    учитываются. Если процесса с таким pid уже нет, счётчики снимка
+    переносятся в exited.json, а сам файл удаляется, чтобы каталог не
+    рос с каждым перезапуском.
+
+    Там же раз в lag_interval секунд замеряется задержка цикла событий:
+    насколько позже заказанного просыпается asyncio.sleep.
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        directory: Optional[str],
+        interval: float,
+        lag_interval: float = 0.5,
+    ):
+        self.registry = registry
+        self.directory = Path(directory) if directory else None
+        self.interval = interval
+        self.lag_interval = lag_interval
+        self.loop_lag = registry.histogram(
+            "event_loop_lag_seconds",
+            "How late asyncio.sleep wakes up",
+        )
+        self._tasks: list[asyncio.Task] = []
+        self._pid: Optional[int] = None
+        self._name = ""
+
+    @property
+    def path(self) -> Path:
+        # Ключ выбирается в самом воркере: после fork он должен смениться
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self._name = f"worker-{pid}-{uuid.uuid4().hex[:8]}.json"
+        return self.directory / self._name
+
+    @property
+    def exited_path(self) -> Path:
+        return self.directory / "exited.json"
+
+    @contextmanager
+    def _lock(self, operation: int):
+        """flock каталога: перенос в exited.json не пересекается с чтением."""
+        with open(self.directory / ".lock", "a") as lock:
+            fcntl.flock(lock, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _write(path: Path, families: list[dict]) -> None:
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(families))
+        os.replace(tmp, path)
+
+    def write_snapshot(self, families: list[dict]) -> None:
+        self._write(self.path, families)
+
+    def _exited(self, stale_before: float) -> list[Path]:
+        """Устаревшие снимки воркеров, процессов которых уже нет."""
+        paths = []
+        for path in self.directory.glob("worker-*.json"):
+            try:
+                if path.stat().st_mtime >= stale_before:
+                    continue
+                os.kill(int(path.stem.split("-")[1]), 0)
+            except ProcessLookupError:
+                paths.append(path)
+            except (OSError, ValueError, IndexError):
+                # Файл уже удалён, процесс чужой или имя не наше
+                continue
+        return paths
+
+    def _fold(self, paths: list[Path]) -> None:
+        """Перенести счётчики и гистограммы снимков в exited.json."""
+        with self._lock(fcntl.LOCK_EX):
+            snapshots = []
+            for path in paths:
+                try:
+                    snapshots.append((json.loads(path.read_text()), False))
+                except (OSError, ValueError):
+                    # Уже перенёс другой воркер
+                    continue
+            if not snapshots:
+                return
+            try:
+                exited = json.loads(self.exited_path.read_text())
+            except FileNotFoundError:
+                exited = []
+            self._write(self.exited_path, merge([(exited, False), *snapshots]))
+            for path in paths:
+                path.unlink(missing_ok=True)
+
+    def read_snapshots(self) -> list[tuple[list[dict], bool]]:
+        stale_before = time.time() - 3 * self.interval
+        exited = self._exited(stale_before)
+        if exited:
+            self._fold(exited)
+        snapshots = []
+        with self._lock(fcntl.LOCK_SH):
+            for path in (
+                self.exited_path,
+                *self.directory.glob("worker-*.json"),
+            ):
+                try:
+                    fresh = path.stat().st_mtime >= stale_before
+                    snapshots.append((json.loads(path.read_text()), fresh))
+                except (OSError, ValueError):
+                    # Файла нет или его ещё пишут: возьмём в следующий раз
+                    continue
+        return snapshots
+
+    def _collect_all(self, families: list[dict]) -> list[dict]:
+        self.write_snapshot(families)
+        return merge(self.read_snapshots())
+
+    async def export(self) -> str:
+        families = self.registry.collect()
+        if self.directory is not None:
+            families = await asyncio.to_thread(self._collect_all, families)
+        return render(families)
+
+    async def _write_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(
+                    self.write_snapshot, self.registry.collect()
+                )
+            except OSError:
+                logger.exception("Metrics snapshot write failed")
+
+    async def _lag_loop(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.lag_interval)
+            lag = time.perf_counter() - started - self.lag_interval
+            self.loop_lag.observe((), max(lag, 0))
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks.append(asyncio.create_task(self._lag_loop()))
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._tasks.append(asyncio.create_task(self._write_loop()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.directory is not None:
+            # Последний снимок остаётся: счётчики воркера входят в итог
+            await asyncio.to_thread(
+                self.write_snapshot, self.registry.collect()
+            )
+
+
+class MetricsMiddleware:
+    """
+    Время ответа по шаблону маршрута, методу и коду ответа.
+
+    Шаблон (/catalog/{mark}/models) берётся из scope["route"], который
+    заполняет роутер; у запросов без маршрута метка <unmatched>, чтобы
+    случайные пути не плодили серии. Время считается до конца тела,
+    включая потоковые ответы.
+    """
+
+    def __init__(self, app: ASGIApp, histogram: Histogram):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", None)
+            self.histogram.observe(
+                (scope["method"], route or "<unmatched>", str(status_code)),
+                time.perf_counter() - started,
+            )
+
+
+metrics = MetricsRegistry()
+
+request_latency = metrics.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    labels=("method", "route", "status"),
+)
+template_render = metrics.histogram(
+    "template_render_seconds",
+    "Jinja template render time",
+    labels=("template",),
+)
+telegram_send = metrics.histogram(
+    "telegram_send_seconds",
+    "Telegram sendMessage latency, failed calls included",
+)
+
+exporter = MetricsExporter(
+    metrics, settings.metrics_dir, settings.metrics_interval
+)
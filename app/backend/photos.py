@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import os
+from datetime import timedelta
+from typing import Optional
+
+import aiofiles.os
+from sqlalchemy import func, or_, select, update
+
+from ..config import settings
+from ..models import Orders
+from .config import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+async def list_photos(archive: str) -> Optional[list[str]]:
+    """Файлы архива заказа или None, если архив ещё не записан."""
+    try:
+        return sorted(await aiofiles.os.listdir(archive))
+    except FileNotFoundError:
+        return None
+
+
+def order_photos(
+    archive: Optional[str], photos: list[str], thumbnails: dict
+) -> list[dict]:
+    """Адреса фотографий заказа и хеши их миниатюр, если они готовы."""
+    if not archive:
+        return []
+    folder = os.path.basename(archive)
+    return [
+        {
+            "src": f"/static/orders/{folder}/{name}",
+            "thumbnail": thumbnails.get(name),
+        }
+        for name in photos
+    ]
+
+
+async def save_photos(session, order_id: int, photos: list[str]) -> None:
+    await session.execute(
+        update(Orders)
+        .where(Orders.id == order_id, Orders.photos.is_(None))
+        .values(photos=photos)
+    )
+
+
+class OrderPhotoIndexer:
+    """
+    Фоновое заполнение списка фотографий заказов.
+
+    Архивы записывает бот, поэтому приложение не знает момента записи:
+    индексатор раз в interval секунд берёт заказы без списка фотографий
+    и читает их каталоги асинхронно. Заказ, архива которого ещё нет,
+    отмечается в photos_checked_at и проверяется снова не раньше чем
+    через retry секунд, уступая очередь остальным.
+    """
+
+    def __init__(self, interval: float, batch_size: int, retry: float):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.retry = timedelta(seconds=retry)
+        self.indexed = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def index_pending(self) -> int:
+        """Проиндексировать одну пачку заказов, вернуть их число."""
+        async with AsyncSessionLocal() as session:
+            pending = (
+                await session.execute(
+                    select(Orders.id, Orders.order_archive)
+                    .where(
+                        Orders.photos.is_(None),
+                        Orders.order_archive.is_not(None),
+                        or_(
+                            Orders.photos_checked_at.is_(None),
+                            Orders.photos_checked_at
+                            < func.now() - self.retry,
+                        ),
+                    )
+                    .order_by(
+                        Orders.photos_checked_at.asc().nulls_first(),
+                        Orders.id.desc(),
+                    )
+                    .limit(self.batch_size)
+                )
+            ).all()
+            photos = await asyncio.gather(
+                *(list_photos(archive) for _, archive in pending)
+            )
+            count = 0
+            missing = []
+            for (order_id, _), names in zip(pending, photos):
+                if names is None:
+                    missing.append(order_id)
+                else:
+                    await save_photos(session, order_id, names)
+                    count += 1
+            if missing:
+                await session.execute(
+                    update(Orders)
+                    .where(Orders.id.in_(missing))
+                    .values(photos_checked_at=func.now())
+                )
+            await session.commit()
+        self.indexed += count
+        return count
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.index_pending()
+            except Exception:
+                logger.exception("Order photo indexing failed")
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+photo_indexer = OrderPhotoIndexer(
+    settings.photo_index_interval,
+    settings.photo_index_batch,
+    settings.photo_index_retry,
+)
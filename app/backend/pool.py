@@ -0,0 +1,75 @@
+import bisect
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class PoolMetrics:
+    """Время получения соединения из пула и ошибки подключения."""
+
+    def __init__(self, buckets: tuple = WAIT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+        self.connect_errors = 0
+
+    def observe(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds += seconds
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+
+    def histogram(self) -> dict:
+        """Накопительные счётчики, как у гистограмм Prometheus."""
+        result = {}
+        total = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            total += count
+            result[str(bound)] = total
+        return result
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, который замеряет ожидание соединения.
+
+    Метрики общие для класса: при dispose() пул пересоздаётся через
+    recreate(), и счётчики не должны обнуляться.
+    """
+
+    metrics = pool_metrics
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        except Exception:
+            self.metrics.connect_errors += 1
+            raise
+        self.metrics.observe(time.perf_counter() - started)
+        return connection
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "timeout": self._timeout,
+            "checkouts": self.metrics.checkouts,
+            "wait_seconds_total": self.metrics.wait_seconds,
+            "wait_seconds_histogram": self.metrics.histogram(),
+            "timeouts": self.metrics.timeouts,
+            "connect_errors": self.metrics.connect_errors,
+        }
@@ -0,0 +1,192 @@
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Сколько символов самого медленного запроса попадает в лог
+STATEMENT_LOG_LENGTH = 200
+
+
+class QueryStats:
+    """Запросы к базе за один HTTP-запрос."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest: Optional[str] = None
+        self.slowest_duration = 0.0
+
+    def add(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.duration += seconds
+        if self.slowest is None or seconds > self.slowest_duration:
+            self.slowest = statement
+            self.slowest_duration = seconds
+
+    def server_timing(self) -> str:
+        value = (
+            f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+        )
+        if self.slowest is not None:
+            value += f", db-slowest;dur={self.slowest_duration * 1000:.1f}"
+        return value
+
+
+current_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None
+)
+
+# Последние превышения бюджета, их проверяет check_query_budgets
+budget_violations: deque = deque(maxlen=100)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Замерять каждый запрос движка.
+
+    Статистика пишется в QueryStats текущего HTTP-запроса: контекст
+    asyncio доходит до синхронных событий через greenlet SQLAlchemy.
+    Запросы вне HTTP (фоновые задачи, старт) не учитываются.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, *args):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, *args):
+        started = conn.info["query_started"].pop()
+        stats = current_stats.get()
+        if stats is not None:
+            stats.add(statement, time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # При ошибке первого подключения соединения ещё нет
+        if context.connection is None:
+            return
+        started = context.connection.info.get("query_started")
+        if started:
+            started.pop()
+
+
+def query_budget(queries: int):
+    """
+    Объявить, сколько запросов к базе может сделать обработчик.
+
+    Ставится под декоратором маршрута, проверяется QueryStatsMiddleware.
+    """
+
+    def decorate(endpoint):
+        endpoint.query_budget = queries
+        return endpoint
+
+    return decorate
+
+
+def route_template(scope: Scope) -> str:
+    """Шаблон пути маршрута, например /orders/{id}, иначе сам путь."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope["path"]
+
+
+class QueryStatsMiddleware:
+    """
+    Считает запросы к базе за HTTP-запрос.
+
+    Итог отдаётся заголовком Server-Timing и пишется в лог полями
+    extra. Запросы, сделанные во время отправки потокового тела, в
+    заголовок уже не попадают, но попадают в лог.
+    """
+
+    def __init__(self, app: ASGIApp, skip_prefixes: tuple = ("/static",)):
+        self.app = app
+        self.skip_prefixes = skip_prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"].startswith(
+            self.skip_prefixes
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_stats.set(stats)
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append(
+                    "Server-Timing", stats.server_timing()
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_stats.reset(token)
+            self.report(scope, stats, status_code)
+
+    def report(self, scope: Scope, stats: QueryStats, status_code: int):
+        fields = {
+            "method": scope["method"],
+            "route": route_template(scope),
+            "status": status_code,
+            "db_queries": stats.count,
+            "db_ms": round(stats.duration * 1000, 1),
+            "db_slowest_ms": round(stats.slowest_duration * 1000, 1),
+            "db_slowest": (stats.slowest or "")[:STATEMENT_LOG_LENGTH],
+        }
+        budget = getattr(scope.get("endpoint"), "query_budget", None)
+        if budget is not None and stats.count > budget:
+            fields["db_budget"] = budget
+            budget_violations.append(fields)
+            logger.warning(
+                "%s %s: %d queries over budget %d",
+                fields["method"],
+                fields["route"],
+                stats.count,
+                budget,
+                extra=fields,
+            )
+        else:
+            logger.info(
+                "%s %s: %d queries in %.1f ms",
+                fields["method"],
+                fields["route"],
+                stats.count,
+                fields["db_ms"],
+                extra=fields,
+            )
+
+
+@contextmanager
+def check_query_budgets():
+    """
+    Упасть, если внутри блока обработчик превысил бюджет запросов.
+
+        with check_query_budgets():
+            client.get("/user/my_orders")
+    """
+    budget_violations.clear()
+    yield budget_violations
+    if budget_violations:
+        raise AssertionError(
+            "Query budget exceeded: "
+            + "; ".join(
+                f"{v['method']} {v['route']} made {v['db_queries']} "
+                f"queries, budget {v['db_budget']}"
+                for v in budget_violations
+            )
+        )
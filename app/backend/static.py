@@ -0,0 +1,165 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+from fastapi.staticfiles import StaticFiles
+from starlette.staticfiles import NotModifiedResponse
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_URL = "/static"
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Загружаемые фотографии не входят в сборку; миниатюры уже названы по хешу
+UPLOAD_DIRS = ("items", "orders", "thumbs")
+CONTENT_ADDRESSED_DIRS = ("thumbs",)
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".html", ".map"}
+
+
+@dataclass
+class Asset:
+    path: str
+    url_path: str
+    media_type: str
+    stat: os.stat_result
+    # Кодировка -> (путь к сжатому файлу, его stat)
+    encoded: dict = field(default_factory=dict)
+
+
+def write_if_stale(path: str, source: str, data: bytes) -> None:
+    if (
+        os.path.exists(path)
+        and os.path.getmtime(path) >= os.path.getmtime(source)
+    ):
+        return
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as file:
+        file.write(data)
+    os.replace(tmp, path)
+
+
+class AssetManifest:
+    """
+    Статические файлы сайта с хешем содержимого в имени.
+
+    styles.css отдаётся как styles.<хеш>.css: при изменении файла меняется
+    адрес, поэтому старый можно кэшировать навсегда. Рядом с текстовыми
+    файлами хранятся .gz и .br, чтобы не сжимать их на каждый запрос.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.urls: dict[str, str] = {}
+        self.assets: dict[str, Asset] = {}
+
+    def build(self) -> int:
+        urls = {}
+        assets = {}
+        for root, dirs, files in os.walk(self.directory):
+            if root == self.directory:
+                dirs[:] = [d for d in dirs if d not in UPLOAD_DIRS]
+            for name in files:
+                stem, ext = os.path.splitext(name)
+                if ext in (".gz", ".br", ".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                relative = os.path.relpath(path, self.directory)
+                with open(path, "rb") as file:
+                    data = file.read()
+                digest = hashlib.sha256(data).hexdigest()[:12]
+                url_path = os.path.join(
+                    os.path.dirname(relative), f"{stem}.{digest}{ext}"
+                )
+                asset = Asset(
+                    path=path,
+                    url_path=url_path,
+                    media_type=mimetypes.guess_type(name)[0]
+                    or "application/octet-stream",
+                    stat=os.stat(path),
+                )
+                if ext in COMPRESSIBLE:
+                    self._compress(asset, data)
+                urls[relative] = url_path
+                assets[url_path] = asset
+        self.urls = urls
+        self.assets = assets
+        return len(assets)
+
+    def _compress(self, asset: Asset, data: bytes) -> None:
+        variants = [("gzip", ".gz", lambda: gzip.compress(data, 9, mtime=0))]
+        if brotli is not None:
+            variants.insert(
+                0, ("br", ".br", lambda: brotli.compress(data, quality=11))
+            )
+        for encoding, suffix, compress in variants:
+            path = asset.path + suffix
+            write_if_stale(path, asset.path, compress())
+            stat = os.stat(path)
+            if stat.st_size < asset.stat.st_size:
+                asset.encoded[encoding] = (path, stat)
+
+    def url(self, path: str) -> str:
+        """Адрес файла с хешем; неизвестные файлы отдаются как есть."""
+        return f"{STATIC_URL}/{self.urls.get(path, path)}"
+
+
+class StaticAssets(StaticFiles):
+    """
+    Раздача /static: файлы из манифеста — с immutable и в сжатом виде,
+    если клиент его принимает, остальное — как обычный StaticFiles.
+    """
+
+    def __init__(self, directory: str, manifest: AssetManifest):
+        super().__init__(directory=directory)
+        self.manifest = manifest
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        asset = self.manifest.assets.get(path)
+        if asset is None:
+            response = await super().get_response(path, scope)
+            if response.status_code == 200 and path.startswith(
+                CONTENT_ADDRESSED_DIRS
+            ):
+                response.headers["Cache-Control"] = IMMUTABLE
+            return response
+
+        request_headers = Headers(scope=scope)
+        encoding = self.pick_encoding(
+            asset, request_headers.get("accept-encoding", "")
+        )
+        if encoding is None:
+            file, stat = asset.path, asset.stat
+        else:
+            file, stat = asset.encoded[encoding]
+        response = FileResponse(
+            file,
+            stat_result=stat,
+            media_type=asset.media_type,
+            headers={"Cache-Control": IMMUTABLE, "Vary": "Accept-Encoding"},
+        )
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    @staticmethod
+    def pick_encoding(asset: Asset, accept: str) -> Optional[str]:
+        accepted = {
+            part.split(";")[0].strip() for part in accept.lower().split(",")
+        }
+        for encoding in ("br", "gzip"):
+            if encoding in asset.encoded and encoding in accepted:
+                return encoding
+        return None
+
+
+assets = AssetManifest("static")
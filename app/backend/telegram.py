@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from fastapi import HTTPException, status
+
+from ..config import settings
+from .metrics import telegram_send
+
+logger = logging.getLogger(__name__)
+
+
+def create_bot() -> Bot:
+    """Бот для отправки уведомлений; API можно подменить локальным сервером."""
+    if settings.telegram_api_url:
+        session = AiohttpSession(
+            api=TelegramAPIServer.from_base(settings.telegram_api_url)
+        )
+        return Bot(token=settings.token, session=session)
+    return Bot(token=settings.token)
+
+
+@dataclass
+class OutgoingMessage:
+    chat_id: int
+    text: str
+    attempts: int = 0
+
+
+class TokenBucket:
+    """Общее ограничение частоты отправки: rate сообщений в секунду."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """
+    Размыкается после threshold ошибок подряд и не пропускает отправку
+    reset_timeout секунд, затем пропускает одну пробную попытку.
+    """
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    async def wait(self) -> None:
+        while True:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half-open" and not self._probing:
+                self._probing = True
+                return
+            if state == "open":
+                delay = self.reset_timeout - (
+                    time.monotonic() - self.opened_at
+                )
+            else:
+                delay = 0.1
+            await asyncio.sleep(delay)
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+
+class TelegramOutbox:
+    """
+    Очередь исходящих сообщений бота.
+
+    Обработчики только ставят сообщение в очередь, отправкой занимаются
+    фоновые воркеры: с общим лимитом частоты, интервалом между
+    сообщениями в один чат, повторами с экспоненциальной задержкой и
+    размыканием цепи при недоступности Telegram.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        maxsize: int,
+        workers: int,
+        global_rate: float,
+        chat_interval: float,
+        max_attempts: int,
+        breaker: CircuitBreaker,
+    ):
+        self.bot = bot
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.workers = workers
+        self.bucket = TokenBucket(global_rate, capacity=1)
+        self.chat_interval = chat_interval
+        self.max_attempts = max_attempts
+        self.breaker = breaker
+        self._chat_next: dict[int, float] = {}
+        self._tasks: list[asyncio.Task] = []
+        self.sent = 0
+        self.retried = 0
+        self.dropped = 0
+        self.send_seconds = 0.0
+
+    def enqueue(self, chat_id: int, text: str) -> None:
+        try:
+            self.queue.put_nowait(OutgoingMessage(chat_id, text))
+        except asyncio.QueueFull:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Не удалось отправить сообщение. Попробуйте позже.",
+                headers={"Retry-After": "5"},
+            )
+
+    async def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._worker())
+                for _ in range(self.workers)
+            ]
+
+    async def stop(self, timeout: float = 10) -> None:
+        """Дождаться отправки накопленных сообщений и остановить воркеры."""
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Telegram outbox stopped with %d unsent messages",
+                self.queue.qsize(),
+            )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _wait_chat_slot(self, chat_id: int) -> None:
+        # Слот резервируется сразу, чтобы параллельные воркеры
+        # не отправили в один чат два сообщения подряд
+        now = time.monotonic()
+        slot = max(now, self._chat_next.get(chat_id, 0))
+        self._chat_next[chat_id] = slot + self.chat_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _worker(self) -> None:
+        while True:
+            message = await self.queue.get()
+            try:
+                await self._deliver(message)
+            except Exception:
+                self.dropped += 1
+                logger.exception(
+                    "Telegram message to %s dropped", message.chat_id
+                )
+            finally:
+                self.queue.task_done()
+
+    async def _deliver(self, message: OutgoingMessage) -> None:
+        while True:
+            await self.breaker.wait()
+            await self._wait_chat_slot(message.chat_id)
+            await self.bucket.acquire()
+            message.attempts += 1
+            started = time.perf_counter()
+            try:
+                await self.bot.send_message(message.chat_id, message.text)
+            except TelegramRetryAfter as exc:
+                # Telegram сам сообщает, сколько ждать
+                self.breaker.record_success()
+                delay = exc.retry_after
+            except (TelegramNetworkError, TelegramServerError):
+                self.breaker.record_failure()
+                if message.attempts >= self.max_attempts:
+                    raise
+                delay = settings.telegram_retry_base * 2 ** (
+                    message.attempts - 1
+                )
+                delay *= random.uniform(0.5, 1.5)
+            except TelegramAPIError:
+                # Telegram доступен, но отклонил сообщение: повтор не поможет
+                self.breaker.record_success()
+                raise
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            else:
+                self.breaker.record_success()
+                self.sent += 1
+                return
+            finally:
+                elapsed = time.perf_counter() - started
+                self.send_seconds += elapsed
+                telegram_send.observe((), elapsed)
+            self.retried += 1
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "sent": self.sent,
+            "retried": self.retried,
+            "dropped": self.dropped,
+            "breaker": self.breaker.state,
+            "send_seconds_total": self.send_seconds,
+        }
+
+
+bot = create_bot()
+outbox = TelegramOutbox(
+    bot,
+    maxsize=settings.telegram_outbox_size,
+    workers=settings.telegram_outbox_workers,
+    global_rate=settings.telegram_global_rate,
+    chat_interval=settings.telegram_chat_interval,
+    max_attempts=settings.telegram_max_attempts,
+    breaker=CircuitBreaker(
+        settings.telegram_breaker_threshold,
+        settings.telegram_breaker_timeout,
+    ),
+)
@@ -0,0 +1,151 @@
+import time
+from typing import AsyncIterator, Optional
+
+from fastapi.requests import Request
+from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi.templating import Jinja2Templates
+from jinja2 import Template
+from sqlalchemy import Select
+
+from ..config import settings
+from ..utils.rows import row_type
+from .cache import page_cache
+from .config import read_session
+from .images import thumbnail_srcset, thumbnail_url
+from .metrics import template_render
+from .static import assets
+
+
+def is_authenticated(request: Request) -> bool:
+    return (
+        hasattr(request.state, "user") and request.state.user is not None
+    )
+
+
+class TimedTemplate(Template):
+    """Шаблон, который пишет время отрисовки в метрики."""
+
+    def render(self, *args, **kwargs) -> str:
+        started = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            template_render.observe(
+                (self.name,), time.perf_counter() - started
+            )
+
+    async def generate_async(self, *args, **kwargs) -> AsyncIterator[str]:
+        """
+        Потоковая отрисовка: паузы, пока часть отправляется клиенту, не
+        считаются, а чтение строк из курсора по ходу отрисовки считается.
+        """
+        chunks = super().generate_async(*args, **kwargs)
+        elapsed = 0.0
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    chunk = await chunks.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    elapsed += time.perf_counter() - started
+                yield chunk
+        finally:
+            await chunks.aclose()
+            template_render.observe((self.name,), elapsed)
+
+
+templates = Jinja2Templates(directory="templates")
+templates.env.template_class = TimedTemplate
+templates.env.globals["is_authenticated"] = is_authenticated
+templates.env.globals["static_url"] = assets.url
+templates.env.globals["thumbnail_url"] = thumbnail_url
+templates.env.globals["thumbnail_srcset"] = thumbnail_srcset
+
+# Асинхронное окружение с общим загрузчиком и глобальными переменными:
+# нужно, чтобы шаблон мог перебирать строки из серверного курсора.
+stream_env = templates.env.overlay(enable_async=True)
+
+
+class StreamedRows:
+    """
+    Строки запроса, которые читаются серверным курсором во время отрисовки.
+
+    Запрос выполняется в собственной сессии при первом обращении к
+    строкам: сессия из get_db закрывается раньше, чем отправляется тело
+    ответа. Как и в StreamedPage, запрос выбирает колонки, а строки
+    отдаются как row_type.
+    """
+
+    def __init__(self, stmt: Select):
+        self.stmt = stmt
+        self.started = False
+
+    def __aiter__(self) -> AsyncIterator:
+        return self._rows()
+
+    async def _rows(self) -> AsyncIterator:
+        async with read_session() as session:
+            result = await session.stream(self.stmt)
+            dto = row_type(tuple(result.keys()))
+            try:
+                async for row in result:
+                    self.started = True
+                    yield dto._make(row)
+            finally:
+                await result.close()
+
+
+async def _render_chunks(
+    name: str, context: dict, sources: list
+) -> AsyncIterator[bytes]:
+    """
+    Отдаёт страницу по частям.
+
+    Пока строки ещё не начали читаться (шапка и навигация из main.html),
+    каждая часть отправляется сразу, дальше части собираются в буфер.
+    """
+    template = stream_env.get_template(name)
+    buffer: list[str] = []
+    size = 0
+    async for chunk in template.generate_async(context):
+        buffer.append(chunk)
+        size += len(chunk)
+        streaming = all(source.started for source in sources)
+        if not streaming or size >= settings.template_stream_chunk:
+            yield "".join(buffer).encode()
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+async def stream_template(
+    name: str,
+    context: dict,
+    cache_key: Optional[tuple[str, str]] = None,
+) -> HTMLResponse:
+    """
+    Потоковый аналог templates.TemplateResponse.
+
+    Значения контекста, у которых есть атрибут started (StreamedRows,
+    StreamedPage), читаются из БД по мере отрисовки. Если задан
+    cache_key, готовая страница сохраняется в кэш страниц.
+    """
+    sources = [
+        value for value in context.values() if hasattr(value, "started")
+    ]
+
+    async def body() -> AsyncIterator[bytes]:
+        chunks = []
+        async for chunk in _render_chunks(name, context, sources):
+            if cache_key is not None:
+                chunks.append(chunk)
+            yield chunk
+        if cache_key is not None:
+            await page_cache.set(cache_key, b"".join(chunks))
+
+    if not settings.template_streaming:
+        return HTMLResponse(b"".join([chunk async for chunk in body()]))
+    return StreamingResponse(body(), media_type="text/html")
@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import (
+    JSON,
+    Integer,
+    String,
+    cast,
+    column,
+    func,
+    or_,
+    select,
+    update,
+    values,
+)
+
+from ..config import settings
+from ..models import Items, Orders
+from .config import AsyncSessionLocal
+from .images import build_thumbnails
+
+logger = logging.getLogger(__name__)
+
+
+class ThumbnailIndexer:
+    """
+    Фоновое построение миниатюр для мотоциклов и фотографий заказов.
+
+    Pillow работает в пуле процессов, чтобы не занимать цикл событий и
+    GIL. Хеши готовых миниатюр сохраняются в items.thumbnail и
+    orders.thumbnails, откуда их берут шаблоны.
+
+    Каждая попытка отмечается в *_checked_at. Строка, для которой
+    миниатюры не получились (нет исходного файла), повторяется не
+    раньше чем через retry секунд и не занимает пачку новых строк.
+    """
+
+    def __init__(
+        self,
+        static_dir: str,
+        workers: int,
+        interval: float,
+        batch_size: int,
+        retry: float,
+    ):
+        self.static_dir = static_dir
+        self.target_dir = os.path.join(static_dir, "thumbs")
+        self.workers = workers
+        self.interval = interval
+        self.batch_size = batch_size
+        self.retry = timedelta(seconds=retry)
+        self.built = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def build(self, source: str) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, build_thumbnails, source, self.target_dir
+        )
+
+    async def _pending(self, stmt) -> list:
+        """Строки без миниатюр; сессия закрывается до сборки миниатюр."""
+        async with AsyncSessionLocal() as session:
+            return (await session.execute(stmt)).all()
+
+    def _due(self, checked_at):
+        """Строки без попыток или с попыткой старше retry."""
+        return or_(checked_at.is_(None), checked_at < func.now() - self.retry)
+
+    async def _save(self, stmt, rows: list[tuple]) -> None:
+        """
+        Записать хеши и отметки попыток одним UPDATE ... FROM (VALUES ...).
+
+        Транзакция короткая: миниатюры построены заранее, и записи в
+        items и orders не ждут пул процессов.
+        """
+        if not rows:
+            return
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                stmt(rows).execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+    async def index_items(self) -> int:
+        pending = await self._pending(
+            select(Items.id, Items.row)
+            .where(
+                Items.thumbnail.is_(None),
+                Items.row.is_not(None),
+                self._due(Items.thumbnail_checked_at),
+            )
+            .order_by(
+                Items.thumbnail_checked_at.asc().nulls_first(),
+                Items.id.desc(),
+            )
+            .limit(self.batch_size)
+        )
+        digests = await asyncio.gather(
+            *(
+                self.build(os.path.join(self.static_dir, "items", row))
+                for _, row in pending
+            )
+        )
+        checked = [
+            (item_id, digest) for (item_id, _), digest in zip(pending, digests)
+        ]
+
+        def stmt(rows):
+            batch = values(
+                column("id", Integer),
+                column("thumbnail", String),
+                name="built",
+            ).data(rows)
+            return (
+                update(Items)
+                .where(Items.id == batch.c.id)
+                .values(
+                    thumbnail=batch.c.thumbnail,
+                    thumbnail_checked_at=func.now(),
+                )
+            )
+
+        await self._save(stmt, checked)
+        return sum(digest is not None for digest in digests)
+
+    async def index_orders(self) -> int:
+        pending = await self._pending(
+            select(Orders.id, Orders.order_archive, Orders.photos)
+            .where(
+                Orders.thumbnails.is_(None),
+                Orders.photos.is_not(None),
+                self._due(Orders.thumbnails_checked_at),
+            )
+            .order_by(
+                Orders.thumbnails_checked_at.asc().nulls_first(),
+                Orders.id.desc(),
+            )
+            .limit(self.batch_size)
+        )
+        checked = []
+        for order_id, archive, photos in pending:
+            digests = await asyncio.gather(
+                *(self.build(os.path.join(archive, name)) for name in photos)
+            )
+            thumbnails = None if None in digests else dict(zip(photos, digests))
+            checked.append((order_id, thumbnails))
+
+        def stmt(rows):
+            batch = values(
+                column("id", Integer),
+                column("thumbnails", JSON(none_as_null=True)),
+                name="built",
+            ).data(rows)
+            return (
+                update(Orders)
+                .where(Orders.id == batch.c.id)
+                .values(
+                    # Пачка из одних неудач даёт столбец VALUES типа text
+                    thumbnails=cast(batch.c.thumbnails, JSON),
+                    thumbnails_checked_at=func.now(),
+                )
+            )
+
+        await self._save(stmt, checked)
+        return sum(thumbnails is not None for _, thumbnails in checked)
+
+    async def index_pending(self) -> int:
+        count = await self.index_items()
+        count += await self.index_orders()
+        self.built += count
+        return count
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.index_pending()
+            except Exception:
+                logger.exception("Thumbnail indexing failed")
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        if self._task is None:
+            # spawn: форк процесса с потоками bcrypt и asyncpg небезопасен
+            self._executor = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            await asyncio.to_thread(
+                self._executor.shutdown, wait=True, cancel_futures=True
+            )
+            self._executor = None
+
+
+thumbnail_indexer = ThumbnailIndexer(
+    "static",
+    settings.thumbnail_workers,
+    settings.thumbnail_interval,
+    settings.thumbnail_batch,
+    settings.thumbnail_retry,
+)
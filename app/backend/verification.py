@@ -0,0 +1,132 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from ..config import settings
+from ..models import VerificationCode
+from .config import AsyncSessionLocal
+
+
+@dataclass
+class Verification:
+    code: str
+    password_hash: str
+
+
+class MemoryVerificationStore:
+    """
+    Коды подтверждения в памяти процесса.
+
+    Время жизни у всех кодов одинаковое, поэтому порядок вставки совпадает
+    с порядком истечения: OrderedDict работает как очередь, и просроченные
+    коды снимаются с её головы при каждом обращении. Запись, чтение и
+    истечение — O(1) амортизированно, без фоновых задач на каждый код.
+    Подходит только для одного воркера.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Verification]] = (
+            OrderedDict()
+        )
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        while self._data:
+            username, (expires, _) = next(iter(self._data.items()))
+            if expires > now:
+                break
+            del self._data[username]
+
+    async def put(self, username: str, code: str, password_hash: str):
+        self._expire()
+        # Повторный запрос кода продлевает срок, запись уходит в хвост
+        self._data.pop(username, None)
+        self._data[username] = (
+            time.monotonic() + self.ttl,
+            Verification(code, password_hash),
+        )
+
+    async def get(self, username: str) -> Optional[Verification]:
+        self._expire()
+        entry = self._data.get(username)
+        return entry[1] if entry else None
+
+    async def delete(self, username: str) -> None:
+        self._data.pop(username, None)
+
+
+class PostgresVerificationStore:
+    """
+    Коды подтверждения в таблице verificationcode, общие для всех воркеров.
+
+    Просроченные коды не видны при чтении благодаря условию на expires_at,
+    а удаляются одним запросом по индексу не чаще раза в ttl секунд.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._next_sweep = 0.0
+
+    async def put(self, username: str, code: str, password_hash: str):
+        stmt = insert(VerificationCode).values(
+            username=username,
+            code=code,
+            password_hash=password_hash,
+            expires_at=func.now() + timedelta(seconds=self.ttl),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[VerificationCode.username],
+            set_={
+                "code": stmt.excluded.code,
+                "password_hash": stmt.excluded.password_hash,
+                "expires_at": stmt.excluded.expires_at,
+            },
+        )
+        async with AsyncSessionLocal() as session:
+            await session.execute(stmt)
+            if time.monotonic() >= self._next_sweep:
+                self._next_sweep = time.monotonic() + self.ttl
+                await session.execute(
+                    delete(VerificationCode).where(
+                        VerificationCode.expires_at <= func.now()
+                    )
+                )
+            await session.commit()
+
+    async def get(self, username: str) -> Optional[Verification]:
+        async with AsyncSessionLocal() as session:
+            row = (
+                await session.execute(
+                    select(
+                        VerificationCode.code, VerificationCode.password_hash
+                    ).where(
+                        VerificationCode.username == username,
+                        VerificationCode.expires_at > func.now(),
+                    )
+                )
+            ).first()
+        return Verification(*row) if row else None
+
+    async def delete(self, username: str) -> None:
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                delete(VerificationCode).where(
+                    VerificationCode.username == username
+                )
+            )
+            await session.commit()
+
+
+def create_verification_store():
+    if settings.verification_backend == "postgres":
+        return PostgresVerificationStore(settings.verification_ttl)
+    return MemoryVerificationStore(settings.verification_ttl)
+
+
+verification_store = create_verification_store()
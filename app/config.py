@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -12,6 +14,81 @@ class Settings(BaseSettings):
     POSTGRES_DB: str
     POSTGRES_HOST: str = 'db'
     POSTGRES_PORT: int = 5432
+
+    # Кэш отрисованных страниц каталога
+    cache_redis_url: Optional[str] = None
+    page_cache_ttl: int = 300
+    page_cache_local_ttl: int = 5
+    page_cache_size: int = 1024
+
+    # Keyset-пагинация списков
+    page_size: int = 50
+    max_page_size: int = 200
+
+    # Потоковая отрисовка списков
+    template_streaming: bool = True
+    template_stream_chunk: int = 16384
+
+    # Пул потоков для bcrypt
+    password_hash_workers: int = 2
+    password_hash_queue: int = 64
+
+    # Очередь уведомлений в Telegram
+    telegram_api_url: Optional[str] = None
+    telegram_outbox_size: int = 10000
+    telegram_outbox_workers: int = 4
+    telegram_global_rate: float = 30
+    telegram_chat_interval: float = 1
+    telegram_max_attempts: int = 5
+    telegram_retry_base: float = 0.5
+    telegram_breaker_threshold: int = 5
+    telegram_breaker_timeout: float = 30
+
+    # Коды подтверждения: memory (один воркер) или postgres (общие)
+    verification_backend: Literal["memory", "postgres"] = "memory"
+    verification_ttl: int = 300
+
+    # Пул соединений с базой
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = -1
+    db_pool_pre_ping: bool = False
+    db_statement_cache_size: int = 100
+    # PgBouncer в режиме transaction между приложением и базой
+    db_pgbouncer: bool = False
+
+    # Массовая загрузка: строк в одной пачке и ошибок в ответе
+    import_batch_size: int = 5000
+    import_max_errors: int = 1000
+
+    # Фоновая индексация фотографий заказов
+    photo_index_interval: float = 30
+    photo_index_batch: int = 100
+    # Через сколько секунд снова искать архив, которого не было на диске
+    photo_index_retry: float = 600
+
+    # Миниатюры фотографий
+    thumbnail_workers: int = 2
+    thumbnail_interval: float = 30
+    thumbnail_batch: int = 50
+    # Через сколько секунд повторить строку без исходного файла
+    thumbnail_retry: float = 86400
+
+    # Запуск и остановка приложения
+    db_warmup_connections: int = 5
+    db_startup_timeout: float = 30
+    shutdown_drain_timeout: float = 10
+
+    # Версия каталога для ETag
+    catalog_version_interval: float = 5
+
+    # Поиск по каталогу: порог word_similarity для pg_trgm
+    search_similarity: float = 0.3
+
+    # Метрики Prometheus: общий каталог снимков для нескольких воркеров
+    metrics_dir: Optional[str] = None
+    metrics_interval: float = 5
     
     
 
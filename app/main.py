@@ -1,43 +1,63 @@
+from app.backend.catalog_version import (
+    CatalogETagMiddleware,
+    catalog_version,
+)
+from app.backend.lifespan import InFlightMiddleware, in_flight, lifespan
+from app.backend.metrics import MetricsMiddleware, request_latency
+from app.backend.sqlstats import QueryStatsMiddleware
+from app.backend.static import StaticAssets, assets
+from app.backend.templates import templates
 from app.routers import main_router
-from app.routers.auth import get_current_user
-from fastapi import FastAPI
-from fastapi.requests import Request
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from app.routers.auth import decode_token
+from fastapi import FastAPI, HTTPException
+from fastapi.requests import HTTPConnection, Request
 from jinja2 import Environment
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from .config import settings
 
-app = FastAPI(title=settings.app_title)
+app = FastAPI(title=settings.app_title, lifespan=lifespan)
 
-templates = Jinja2Templates(directory="templates")
-templates.env.globals["is_authenticated"] = (
-    lambda request: hasattr(request.state, "user")
-    and request.state.user is not None
-)
+app.mount("/static", StaticAssets("static", assets), name="static")
+
+
+class AuthMiddleware:
+    """
+    Проверяет токен из cookie один раз на запрос.
+
+    Данные пользователя кладутся в request.state.user, ошибка проверки —
+    в request.state.auth_error, откуда их берёт get_current_user.
+    Запросы к статике пропускаются без проверки.
+    """
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+    def __init__(self, app: ASGIApp, skip_prefixes: tuple = ("/static",)):
+        self.app = app
+        self.skip_prefixes = skip_prefixes
 
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"].startswith(
+            self.skip_prefixes
+        ):
+            await self.app(scope, receive, send)
+            return
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # Попытка получить текущего пользователя
-        try:
-            user = await get_current_user(
-                token=request.cookies.get("users_access_token")
-            )
-            request.state.user = user
-        except:
-            request.state.user = (
-                None  # Если токен недействителен или отсутствует
-            )
+        state = scope.setdefault("state", {})
+        state["user"] = None
+        token = HTTPConnection(scope).cookies.get("users_access_token")
+        if token:
+            try:
+                state["user"] = decode_token(token)
+            except HTTPException as exc:
+                state["auth_error"] = exc
 
-        response = await call_next(request)
-        return response
+        await self.app(scope, receive, send)
 
 
+app.add_middleware(CatalogETagMiddleware, watcher=catalog_version)
 app.add_middleware(AuthMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(InFlightMiddleware, tracker=in_flight)
+app.add_middleware(MetricsMiddleware, histogram=request_latency)
 
 
 @app.get("/")
@@ -1,4 +1,14 @@
-from .models import Catalog, Items, Manufacturer, Orders, Payment, Users
+from .models import (
+    Catalog,
+    CatalogVersion,
+    CatalogVersionBump,
+    Items,
+    Manufacturer,
+    Orders,
+    Payment,
+    Users,
+    VerificationCode,
+)
 
 __all__ = [
     Users,
@@ -7,4 +17,7 @@ __all__ = [
     Manufacturer,
     Catalog,
     Items,
+    VerificationCode,
+    CatalogVersion,
+    CatalogVersionBump,
 ]
@@ -3,11 +3,15 @@ from sqlalchemy import (
     BigInteger,
     Boolean,
     Column,
+    Computed,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
+    JSON,
     String,
+    text,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -29,16 +33,34 @@ class Users(Base):
 
 
 class Payment(Base):
+    __table_args__ = (
+        Index(
+            "ix_payment_tg_id_confirmed",
+            "tg_id",
+            postgresql_where=text("confirmed"),
+        ),
+    )
+
     timestamp = Column(DateTime(timezone=False), server_default=func.now())
-    tg_id = Column(BigInteger, ForeignKey("users.tg_id", ondelete="CASCADE"))
+    tg_id = Column(
+        BigInteger, ForeignKey("users.tg_id", ondelete="CASCADE"), index=True
+    )
     amount = Column(Float, default=0)
     uuid = Column(String)
     confirmed = Column(Boolean, default=False)
 
 
 class Orders(Base):
+    __table_args__ = (
+        Index(
+            "ix_orders_tg_id_paid", "tg_id", postgresql_where=text("is_paid")
+        ),
+    )
+
     timestamp = Column(DateTime(timezone=False), server_default=func.now())
-    tg_id = Column(BigInteger, ForeignKey("users.tg_id", ondelete="CASCADE"))
+    tg_id = Column(
+        BigInteger, ForeignKey("users.tg_id", ondelete="CASCADE"), index=True
+    )
     quantity = Column(Integer, default=0)
     model = Column(String, ForeignKey("catalog.model", ondelete="CASCADE"))
     cc = Column(Integer, default=0)
@@ -47,6 +69,14 @@ class Orders(Base):
     purchase = Column(Float, default=0)
     is_paid = Column(Boolean, default=False)
     order_archive = Column(String, default=None)
+    # Имена файлов в order_archive, заполняет OrderPhotoIndexer
+    photos = Column(JSON(none_as_null=True), default=None)
+    # Когда архив в последний раз не нашёлся на диске
+    photos_checked_at = Column(DateTime(timezone=True), default=None)
+    # Имя файла -> хеш миниатюр, заполняет ThumbnailIndexer
+    thumbnails = Column(JSON(none_as_null=True), default=None)
+    # Последняя попытка построить миниатюры, в том числе неудачная
+    thumbnails_checked_at = Column(DateTime(timezone=True), default=None)
 
 
 class Manufacturer(Base):
@@ -58,6 +88,28 @@ class Manufacturer(Base):
 
 
 class Catalog(Base):
+    # Списки моделей идут keyset-пагинацией по (sort, id)
+    __table_args__ = (
+        Index("ix_catalog_manufacturer_id", "manufacturer", "id"),
+        Index(
+            "ix_catalog_in_stock_id",
+            "id",
+            postgresql_where=text("quantity > 0"),
+        ),
+        Index(
+            "ix_catalog_manufacturer_in_stock_id",
+            "manufacturer",
+            "id",
+            postgresql_where=text("quantity > 0"),
+        ),
+        Index(
+            "ix_catalog_search_trgm",
+            "search",
+            postgresql_using="gin",
+            postgresql_ops={"search": "gin_trgm_ops"},
+        ),
+    )
+
     manufacturer = Column(
         String, ForeignKey("manufacturer.name", ondelete="CASCADE")
     )
@@ -65,15 +117,58 @@ class Catalog(Base):
     model = Column(String, unique=True)
     quantity = Column(Integer, default=0)
     sort_type = Column(String, default=None)
+    # Текст для поиска, пересчитывается базой при каждой записи строки
+    search = Column(
+        String,
+        Computed(
+            "coalesce(manufacturer, '') || ' ' || coalesce(model, '') "
+            "|| ' ' || coalesce(type, '')",
+            persisted=True,
+        ),
+    )
     items = relationship("Items", backref="items", lazy=True)
     type_orders = relationship("Orders", backref="type_orders", lazy=True)
     manufacturer_obj = relationship("Manufacturer", back_populates="models")
 
 
 class Items(Base):
+    __table_args__ = (
+        Index("ix_items_model_id", "model", "id"),
+        Index("ix_items_model_price_id", "model", "price", "id"),
+        # Фильтры по диапазонам; по первому индексу фасеты всего списка
+        # считаются без чтения таблицы
+        Index("ix_items_cc_horsepower_price", "cc", "horsepower", "price"),
+        Index("ix_items_horsepower_id", "horsepower", "id"),
+        Index("ix_items_price_id", "price", "id"),
+    )
+
     model = Column(String, ForeignKey("catalog.model"))
     cc = Column(Integer, default=0)
     horsepower = Column(Integer, default=0)
     age = Column(String, default=None)
     price = Column(Float, default=0)
     row = Column(String, unique=True)
+    # Хеш миниатюр static/items/{row}, заполняет ThumbnailIndexer
+    thumbnail = Column(String, default=None)
+    # Последняя попытка построить миниатюры, в том числе неудачная
+    thumbnail_checked_at = Column(DateTime(timezone=True), default=None)
+
+
+class VerificationCode(Base):
+    username = Column(String, unique=True)
+    code = Column(String)
+    password_hash = Column(String)
+    expires_at = Column(DateTime(timezone=True), index=True)
+
+
+class CatalogVersion(Base):
+    # Одна строка; version увеличивает триггер на manufacturer, catalog и items
+    version = Column(BigInteger, nullable=False, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class CatalogVersionBump(Base):
+    # Отложенное увеличение версии: одна строка на транзакцию с
+    # изменениями каталога, id — номер транзакции. Строку вставляет и
+    # удаляет триггер, при COMMIT версия увеличивается один раз.
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
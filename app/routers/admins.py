@@ -1,11 +1,23 @@
+from collections import defaultdict
 from typing import Annotated
 
+from app.backend.config import async_engine
 from app.backend.db_depends import get_db
+from app.backend.hashing import password_hasher
+from app.backend.telegram import outbox
 from app.models import Orders, Users
-from app.schemas import OrderDB, User
+from app.schemas import BalanceDelta, OrderDB, User
 from app.utils import check_admin_permissions, ensure_exists
-from fastapi import APIRouter, Depends
-from sqlalchemy import select, update
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import (
+    Float,
+    String,
+    column,
+    func,
+    select,
+    update,
+    values,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
@@ -13,6 +25,9 @@ from .auth import get_current_user
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+# Две привязанные переменные на строку, у asyncpg предел 32767
+BALANCE_BATCH_SIZE = 5000
+
 
 @router.patch("/update_user_balance")
 async def update_user_balance(
@@ -22,22 +37,69 @@ async def update_user_balance(
     amout: float,
 ):
     await check_admin_permissions(get_user)
-    balance = await db.scalar(
-        select(Users.balance).where(Users.username == username)
-    )
-    await ensure_exists(balance, "User")
-
-    new_balance = balance + amout
-
-    await db.execute(
+    # Прибавляем в самом UPDATE, чтобы параллельные начисления не терялись
+    new_balance = await db.scalar(
         update(Users)
         .where(Users.username == username)
-        .values(balance=new_balance)
+        .values(balance=func.coalesce(Users.balance, 0) + amout)
+        .returning(Users.balance)
     )
+    await ensure_exists(new_balance, "User")
     await db.commit()
     return {
         "status_code": status.HTTP_200_OK,
         "detail": "User's balance has been updated",
+        "balance": new_balance,
+    }
+
+
+@router.patch("/update_user_balances")
+async def update_user_balances(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    get_user: Annotated[dict, Depends(get_current_user)],
+    deltas: list[BalanceDelta],
+):
+    """
+    Начисляет пачку изменений баланса в одной транзакции.
+
+    Если хотя бы одного пользователя нет, ничего не меняется.
+    """
+    await check_admin_permissions(get_user)
+    # UPDATE ... FROM применяет к строке только одно совпадение,
+    # поэтому повторы одного пользователя складываются заранее
+    totals = defaultdict(float)
+    for delta in deltas:
+        totals[delta.username] += delta.amount
+
+    rows = list(totals.items())
+    updated = set()
+    for start in range(0, len(rows), BALANCE_BATCH_SIZE):
+        batch = values(
+            column("username", String),
+            column("amount", Float),
+            name="deltas",
+        ).data(rows[start : start + BALANCE_BATCH_SIZE])
+        result = await db.scalars(
+            update(Users)
+            .where(Users.username == batch.c.username)
+            .values(balance=func.coalesce(Users.balance, 0) + batch.c.amount)
+            .returning(Users.username)
+            .execution_options(synchronize_session=False)
+        )
+        updated.update(result)
+
+    missing = sorted(totals.keys() - updated)
+    if missing:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"message": "User not found.", "usernames": missing},
+        )
+    await db.commit()
+    return {
+        "status_code": status.HTTP_200_OK,
+        "detail": "Users' balances have been updated",
+        "updated": len(updated),
     }
 
 
@@ -94,3 +156,27 @@ async def get_user_orders(
         select(Orders).where(Orders.tg_id == user, Orders.is_paid == True)
     )
     return orders.all()
+
+
+@router.get("/hasher_stats")
+async def get_hasher_stats(
+    get_user: Annotated[dict, Depends(get_current_user)],
+):
+    await check_admin_permissions(get_user)
+    return password_hasher.stats()
+
+
+@router.get("/outbox_stats")
+async def get_outbox_stats(
+    get_user: Annotated[dict, Depends(get_current_user)],
+):
+    await check_admin_permissions(get_user)
+    return outbox.stats()
+
+
+@router.get("/pool_stats")
+async def get_pool_stats(
+    get_user: Annotated[dict, Depends(get_current_user)],
+):
+    await check_admin_permissions(get_user)
+    return async_engine.pool.stats()
@@ -0,0 +1,157 @@
+from typing import Annotated, Optional
+
+from app.backend.db_depends import get_db
+from app.models import Catalog, Items, Manufacturer, Orders, Payment
+from app.schemas import ItemDB, ManufacturerDB, ModelDB, OrderDB, PaymentDB
+from app.utils import (
+    ItemFilters,
+    PageParams,
+    ensure_exists,
+    paginate_rows,
+    parse_fields,
+    rows_to_dicts,
+    select_fields,
+)
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .auth import get_current_user
+from .catalog import MarkSort, ModelSort
+from .items import ItemSort
+from .user import user_tg_id
+
+router = APIRouter(
+    prefix="/api/v1", tags=["api"], default_response_class=ORJSONResponse
+)
+
+Fields = Annotated[
+    Optional[str],
+    Query(description="Поля ответа через запятую, по умолчанию все"),
+]
+
+
+async def fields_page(
+    db: AsyncSession,
+    stmt,
+    names: list[str],
+    page_params: PageParams,
+    sort_column,
+    id_column,
+) -> ORJSONResponse:
+    """
+    Страница строк в JSON.
+
+    Ответ собирается сразу в ORJSONResponse: иначе FastAPI прогнал бы
+    каждую строку через jsonable_encoder.
+    """
+    page = await paginate_rows(db, stmt, page_params, sort_column, id_column)
+    return ORJSONResponse(
+        {
+            "items": rows_to_dicts(page.items, names),
+            "next_cursor": page.next_cursor,
+            "prev_cursor": page.prev_cursor,
+        }
+    )
+
+
+@router.get("/catalog/marks")
+async def api_marks(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    page_params: Annotated[PageParams, Depends()],
+    fields: Fields = None,
+    sort: MarkSort = "id",
+):
+    names = parse_fields(fields, ManufacturerDB)
+    sort_column = getattr(Manufacturer, sort)
+    stmt = select_fields(
+        Manufacturer.__table__, names, sort_column, Manufacturer.id
+    )
+    return await fields_page(
+        db, stmt, names, page_params, sort_column, Manufacturer.id
+    )
+
+
+@router.get("/catalog/models")
+async def api_models(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    page_params: Annotated[PageParams, Depends()],
+    mark: Optional[str] = None,
+    in_stock: bool = False,
+    fields: Fields = None,
+    sort: ModelSort = "id",
+):
+    names = parse_fields(fields, ModelDB)
+    sort_column = getattr(Catalog, sort)
+    stmt = select_fields(Catalog.__table__, names, sort_column, Catalog.id)
+    if mark is not None:
+        await ensure_exists(
+            await db.scalar(
+                select(Manufacturer.id).where(Manufacturer.name == mark)
+            ),
+            "Category",
+        )
+        stmt = stmt.where(Catalog.manufacturer == mark)
+    if in_stock:
+        stmt = stmt.where(Catalog.quantity > 0)
+    return await fields_page(
+        db, stmt, names, page_params, sort_column, Catalog.id
+    )
+
+
+@router.get("/items")
+async def api_items(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    page_params: Annotated[PageParams, Depends()],
+    filters: Annotated[ItemFilters, Depends()],
+    model: Optional[str] = None,
+    fields: Fields = None,
+    sort: ItemSort = "id",
+):
+    names = parse_fields(fields, ItemDB)
+    sort_column = getattr(Items, sort)
+    stmt = select_fields(Items.__table__, names, sort_column, Items.id)
+    if model is not None:
+        await ensure_exists(
+            await db.scalar(select(Catalog.id).where(Catalog.model == model)),
+            "Model",
+        )
+        stmt = stmt.where(Items.model == model)
+    return await fields_page(
+        db, filters.apply(stmt), names, page_params, sort_column, Items.id
+    )
+
+
+@router.get("/user/orders")
+async def api_orders(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    get_user: Annotated[dict, Depends(get_current_user)],
+    page_params: Annotated[PageParams, Depends()],
+    fields: Fields = None,
+):
+    names = parse_fields(fields, OrderDB)
+    stmt = select_fields(Orders.__table__, names, Orders.id).where(
+        Orders.tg_id == user_tg_id(get_user),
+        Orders.is_paid == True,
+    )
+    return await fields_page(
+        db, stmt, names, page_params, Orders.id, Orders.id
+    )
+
+
+@router.get("/user/payments")
+async def api_payments(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    get_user: Annotated[dict, Depends(get_current_user)],
+    page_params: Annotated[PageParams, Depends()],
+    fields: Fields = None,
+):
+    names = parse_fields(fields, PaymentDB)
+    stmt = select_fields(Payment.__table__, names, Payment.id).where(
+        Payment.tg_id == user_tg_id(get_user),
+        Payment.confirmed == True,
+    )
+    return await fields_page(
+        db, stmt, names, page_params, Payment.id, Payment.id
+    )
@@ -1,28 +1,26 @@
-import asyncio
 import random
 from datetime import datetime, timedelta
 from typing import Annotated
 
-from aiogram import Bot, Dispatcher
+from aiogram import Dispatcher
 from app.backend.db_depends import get_db
+from app.backend.hashing import password_hasher
+from app.backend.telegram import outbox
+from app.backend.templates import templates
+from app.backend.verification import verification_store
 from app.models import Users
 from app.schemas import CreateUser
-from app.utils import remove_code_after_timeout
 from fastapi import APIRouter, Depends, Form, HTTPException, Response, status
 from fastapi.requests import Request
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.security import HTTPBasic, OAuth2PasswordBearer
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from jose import ExpiredSignatureError, JWTError, jwt
-from passlib.context import CryptContext
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..config import settings
 
 router = APIRouter(prefix="/auth", tags=["auth"])
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 security = HTTPBasic()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
@@ -31,20 +29,8 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 SECRET_KEY = settings.secret_key
 ALGORITHM = settings.algorithm
 
-bot = Bot(token=settings.token)
 dp = Dispatcher()
 
-templates = Jinja2Templates(directory="templates")
-templates.env.globals["is_authenticated"] = (
-    lambda request: hasattr(request.state, "user")
-    and request.state.user is not None
-)
-router.mount("/static", StaticFiles(directory="static"), name="static")
-
-# Глобальный словарь для хранения кодов подтверждения
-verification_codes = {}
-hash_passwords = {}
-
 
 @router.get("/registration", response_class=HTMLResponse)
 async def registration_form(request: Request):
@@ -83,17 +69,13 @@ async def send_code_to_telegram(
 
     # Генерируем код подтверждения
     verification_code = str(random.randint(100000, 999999))
-    verification_codes[user.username] = verification_code
-    asyncio.create_task(
-        remove_code_after_timeout(verification_codes, username)
+    await verification_store.put(
+        user.username,
+        verification_code,
+        await password_hasher.hash(user.password),
     )
 
-    hash_passwords[user.username] = bcrypt_context.hash(user.password)
-    asyncio.create_task(remove_code_after_timeout(hash_passwords, username))
-
-    await bot.send_message(
-        tg_id, f"Ваш код подтверждения: {verification_code}"
-    )
+    outbox.enqueue(tg_id, f"Ваш код подтверждения: {verification_code}")
 
     return templates.TemplateResponse("verify.html", {"request": request})
 
@@ -108,15 +90,16 @@ async def verify_code(
 ):
 
     # Проверяем, есть ли пользователь
-    if username not in verification_codes:
+    verification = await verification_store.get(username)
+    if verification is None:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
 
     # Проверяем код подтверждения
-    if verification_codes.get(username) == code:
-        del verification_codes[username]  # Удаляем код после подтверждения
+    if verification.code == code:
+        # Удаляем код после подтверждения
+        await verification_store.delete(username)
 
-        password = hash_passwords.get(username)
-        del hash_passwords[username]
+        password = verification.password_hash
 
         await db.execute(
             update(Users)
@@ -129,7 +112,7 @@ async def verify_code(
         tg_id = await db.scalar(
             select(Users.tg_id).where(Users.username == username)
         )
-        await bot.send_message(tg_id, "Успешная регистрация!")
+        outbox.enqueue(tg_id, "Успешная регистрация!")
         return templates.TemplateResponse(
             "index.html",
             {
@@ -151,9 +134,11 @@ async def authanticate_user(
     )
     if (
         not user
-        or not bcrypt_context.verify(user_data.password, user.hashed_password)
         or user.active is False
         or user.hashed_password is None
+        or not await password_hasher.verify(
+            user_data.password, user.hashed_password
+        )
     ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -232,7 +217,10 @@ def get_token(request: Request):
     return token
 
 
-async def get_current_user(token: str = Depends(get_token)):
+def decode_token(token: str) -> dict:
+    """
+    Проверяет JWT и возвращает данные пользователя.
+    """
     try:
         payload = jwt.decode(
             token,
@@ -263,6 +251,17 @@ async def get_current_user(token: str = Depends(get_token)):
     return {"username": username, "id": id, "is_admin": is_admin}
 
 
+async def get_current_user(request: Request):
+    # Токен уже проверен в AuthMiddleware, повторно не декодируем
+    user = getattr(request.state, "user", None)
+    if user is not None:
+        return user
+    auth_error = getattr(request.state, "auth_error", None)
+    if auth_error is not None:
+        raise auth_error
+    return decode_token(get_token(request))
+
+
 @router.get("/password", response_class=HTMLResponse)
 async def change_password(
     request: Request,
@@ -296,17 +295,11 @@ async def send_change_code_to_telegram(
     )
     # Генерируем код подтверждения
     verification_code = str(random.randint(100000, 999999))
-    verification_codes[username] = verification_code
-    asyncio.create_task(
-        remove_code_after_timeout(verification_codes, username)
+    await verification_store.put(
+        username, verification_code, await password_hasher.hash(password)
     )
 
-    hash_passwords[username] = bcrypt_context.hash(password)
-    asyncio.create_task(remove_code_after_timeout(hash_passwords, username))
-
-    await bot.send_message(
-        tg_id, f"Ваш код подтверждения: {verification_code}"
-    )
+    outbox.enqueue(tg_id, f"Ваш код подтверждения: {verification_code}")
 
     return templates.TemplateResponse(
         "verify_change.html", {"request": request}
@@ -322,15 +315,16 @@ async def change_verify_code(
 
     username = get_user.get("username")
     # Проверяем, есть ли пользователь
-    if username not in verification_codes:
+    verification = await verification_store.get(username)
+    if verification is None:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
 
     # Проверяем код подтверждения
-    if verification_codes.get(username) == code:
-        del verification_codes[username]  # Удаляем код после подтверждения
+    if verification.code == code:
+        # Удаляем код после подтверждения
+        await verification_store.delete(username)
 
-        password = hash_passwords.get(username)
-        del hash_passwords[username]
+        password = verification.password_hash
 
         await db.execute(
             update(Users)
@@ -1,6 +1,8 @@
-from typing import Annotated
+from typing import Annotated, Literal
 
+from app.backend.cache import page_cache, page_key
 from app.backend.db_depends import get_db
+from app.backend.templates import stream_template, templates
 from app.models import Catalog, Manufacturer
 from app.schemas import (
     CreateManufacturer,
@@ -9,39 +11,82 @@ from app.schemas import (
     ModelDB,
 )
 from app.utils import (
+    PageParams,
+    StreamedPage,
+    bulk_upsert,
     check_admin_permissions,
     ensure_exists,
     get_category_by_name,
     get_product_by_model,
+    search_catalog,
+    select_rows,
 )
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.requests import Request
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse
 from sqlalchemy import delete, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..config import settings
 from .auth import get_current_user
 
 router = APIRouter(prefix="/catalog", tags=["catalog"])
 
-templates = Jinja2Templates(directory="templates")
-templates.env.globals["is_authenticated"] = (
-    lambda request: hasattr(request.state, "user")
-    and request.state.user is not None
-)
+MarkSort = Literal["id", "name"]
+ModelSort = Literal["id", "model"]
+
+# Колонки, которые выводят списки марок и моделей
+MARK_COLUMNS = ("id", "name", "country")
+MODEL_COLUMNS = ("id", "manufacturer", "type", "model", "quantity")
 
-router.mount("/static", StaticFiles(directory="static"), name="static")
+
+def product_pages(manufacturer: str, quantity: int) -> list[tuple[str, ...]]:
+    """Закэшированные страницы, на которых выводится модель."""
+    pages = [("all_models",), ("mark_models", manufacturer)]
+    if quantity:
+        pages += [("in_stock",), ("mark_in_stock", manufacturer)]
+    return pages
 
 
 # Обработчики категорий
 @router.get("/", response_model=list[ManufacturerDB])
 async def get_all_marks(
-    request: Request, db: Annotated[AsyncSession, Depends(get_db)]
+    request: Request,
+    page_params: Annotated[PageParams, Depends()],
+    sort: MarkSort = "id",
+):
+    key = page_key(request, "marks")
+    cached = await page_cache.get(key)
+    if cached is not None:
+        return HTMLResponse(cached)
+
+    page = StreamedPage(
+        select_rows(Manufacturer, *MARK_COLUMNS),
+        page_params,
+        getattr(Manufacturer, sort),
+        Manufacturer.id,
+    )
+    return await stream_template(
+        "marks.html",
+        {"request": request, "categories": page.items, "page": page},
+        cache_key=key,
+    )
+
+
+@router.get("/search", response_model=list[ModelDB])
+async def search_models(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    page_params: Annotated[PageParams, Depends()],
+    q: str = Query(min_length=2, max_length=100),
 ):
-    categories = await db.scalars(select(Manufacturer))
+    """Поиск моделей по марке, названию и типу, устойчивый к опечаткам."""
+    page = await search_catalog(
+        db, q.strip(), page_params, settings.search_similarity
+    )
     return templates.TemplateResponse(
-        "marks.html", {"request": request, "categories": categories}
+        "search.html",
+        {"request": request, "products": page.items, "page": page, "q": q},
     )
 
 
@@ -73,6 +118,7 @@ async def create_mark(
         insert(Manufacturer).values(**create_category.model_dump())
     )
     await db.commit()
+    await page_cache.invalidate(("marks",))
     return {
         "status_code": status.HTTP_201_CREATED,
         "transaction": "Successful",
@@ -95,6 +141,10 @@ async def update_mark(
         .values(**update_category.model_dump())
     )
     await db.commit()
+    pages = [("marks",)]
+    if update_category.name != mark:
+        pages += [("mark_models", mark), ("mark_in_stock", mark)]
+    await page_cache.invalidate(*pages)
     return {
         "status_code": status.HTTP_200_OK,
         "transaction": "Category update is successful",
@@ -112,86 +162,173 @@ async def delete_mark(
     await ensure_exists(category, "Category")
     await db.execute(delete(Manufacturer).where(Manufacturer.name == mark))
     await db.commit()
+    # Модели марки удаляются каскадно
+    await page_cache.invalidate(
+        ("marks",),
+        ("all_models",),
+        ("in_stock",),
+        ("mark_models", mark),
+        ("mark_in_stock", mark),
+    )
     return {
         "status_code": status.HTTP_200_OK,
         "transaction": "Category delete is successful",
     }
 
 
+@router.post("/bulk_upsert_marks")
+async def bulk_upsert_marks(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    marks: list[CreateManufacturer],
+    get_user: Annotated[dict, Depends(get_current_user)],
+):
+    """Создаёт и обновляет марки по имени одной пачкой запросов."""
+    await check_admin_permissions(get_user)
+    counts = await bulk_upsert(
+        db,
+        Manufacturer.__table__,
+        "name",
+        [mark.model_dump() for mark in marks],
+        settings.import_batch_size,
+    )
+    await db.commit()
+    if counts["inserted"] or counts["updated"]:
+        await page_cache.invalidate(("marks",))
+    return {"status_code": status.HTTP_200_OK, **counts}
+
+
 # Обработчики продуктов
 @router.get("/models/all_models", response_model=list[ModelDB])
 async def get_all_models(
-    request: Request, db: Annotated[AsyncSession, Depends(get_db)]
+    request: Request,
+    page_params: Annotated[PageParams, Depends()],
+    sort: ModelSort = "id",
 ):
-    products = await db.scalars(select(Catalog))
-    return templates.TemplateResponse(
+    key = page_key(request, "all_models")
+    cached = await page_cache.get(key)
+    if cached is not None:
+        return HTMLResponse(cached)
+
+    page = StreamedPage(
+        select_rows(Catalog, *MODEL_COLUMNS),
+        page_params,
+        getattr(Catalog, sort),
+        Catalog.id,
+    )
+    return await stream_template(
         "catalog.html",
         {
             "request": request,
-            "products": products,
+            "products": page.items,
+            "page": page,
             "all": True,
             "in_stock": False,
         },
+        cache_key=key,
     )
 
 
 @router.get("/models/in_stock", response_model=list[ModelDB])
 async def get_stock_models(
-    request: Request, db: Annotated[AsyncSession, Depends(get_db)]
+    request: Request,
+    page_params: Annotated[PageParams, Depends()],
+    sort: ModelSort = "id",
 ):
-    products = await db.scalars(select(Catalog).where(Catalog.quantity > 0))
-    return templates.TemplateResponse(
+    key = page_key(request, "in_stock")
+    cached = await page_cache.get(key)
+    if cached is not None:
+        return HTMLResponse(cached)
+
+    page = StreamedPage(
+        select_rows(Catalog, *MODEL_COLUMNS).where(Catalog.quantity > 0),
+        page_params,
+        getattr(Catalog, sort),
+        Catalog.id,
+    )
+    return await stream_template(
         "catalog.html",
         {
             "request": request,
-            "products": products,
+            "products": page.items,
+            "page": page,
             "all": True,
             "in_stock": True,
         },
+        cache_key=key,
     )
 
 
 @router.get("/{mark}/models", response_model=list[ModelDB])
 async def product_by_mark(
-    request: Request, db: Annotated[AsyncSession, Depends(get_db)], mark: str
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    mark: str,
+    page_params: Annotated[PageParams, Depends()],
+    sort: ModelSort = "id",
 ):
+    key = page_key(request, "mark_models", mark)
+    cached = await page_cache.get(key)
+    if cached is not None:
+        return HTMLResponse(cached)
+
     category = await get_category_by_name(db, mark)
     await ensure_exists(category, "Category")
-    products = await db.scalars(
-        select(Catalog).where(Catalog.manufacturer == mark)
+    page = StreamedPage(
+        select_rows(Catalog, *MODEL_COLUMNS).where(
+            Catalog.manufacturer == mark
+        ),
+        page_params,
+        getattr(Catalog, sort),
+        Catalog.id,
     )
-    return templates.TemplateResponse(
+    return await stream_template(
         "catalog.html",
         {
             "request": request,
-            "products": products,
+            "products": page.items,
+            "page": page,
             "all": False,
             "in_stock": False,
             "mark": mark,
         },
+        cache_key=key,
     )
 
 
 @router.get("/{mark}/in_stock", response_model=list[ModelDB])
 async def product_by_mark_in_stock(
-    request: Request, db: Annotated[AsyncSession, Depends(get_db)], mark: str
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    mark: str,
+    page_params: Annotated[PageParams, Depends()],
+    sort: ModelSort = "id",
 ):
+    key = page_key(request, "mark_in_stock", mark)
+    cached = await page_cache.get(key)
+    if cached is not None:
+        return HTMLResponse(cached)
+
     category = await get_category_by_name(db, mark)
     await ensure_exists(category, "Category")
-    products = await db.scalars(
-        select(Catalog).where(
+    page = StreamedPage(
+        select_rows(Catalog, *MODEL_COLUMNS).where(
             Catalog.manufacturer == mark, Catalog.quantity > 0
-        )
+        ),
+        page_params,
+        getattr(Catalog, sort),
+        Catalog.id,
     )
-    return templates.TemplateResponse(
+    return await stream_template(
         "catalog.html",
         {
             "request": request,
-            "products": products,
+            "products": page.items,
+            "page": page,
             "all": False,
             "in_stock": True,
             "mark": mark,
         },
+        cache_key=key,
     )
 
 
@@ -217,6 +354,10 @@ async def create_product(
     await ensure_exists(category, "Category")
     await db.execute(insert(Catalog).values(**create_product.model_dump()))
     await db.commit()
+    # Новая модель создаётся без остатка, страницы наличия не меняются
+    await page_cache.invalidate(
+        ("all_models",), ("mark_models", create_product.manufacturer)
+    )
     return {
         "status_code": status.HTTP_201_CREATED,
         "transaction": "Successful",
@@ -240,6 +381,10 @@ async def update_product(
         .values(**update_product.dict())
     )
     await db.commit()
+    await page_cache.invalidate(
+        *product_pages(product.manufacturer, product.quantity),
+        *product_pages(update_product.manufacturer, product.quantity),
+    )
     return {
         "status_code": status.HTTP_200_OK,
         "transaction": "Product update is successful",
@@ -257,7 +402,49 @@ async def delete_product(
     await ensure_exists(product, "Product")
     await db.execute(delete(Catalog).where(Catalog.model == model))
     await db.commit()
+    await page_cache.invalidate(
+        *product_pages(product.manufacturer, product.quantity)
+    )
     return {
         "status_code": status.HTTP_200_OK,
         "transaction": "Product delete is successful",
     }
+
+
+@router.post("/models/bulk_upsert")
+async def bulk_upsert_products(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    products: list[CreateModel],
+    get_user: Annotated[dict, Depends(get_current_user)],
+):
+    """
+    Создаёт и обновляет модели по названию одной пачкой запросов.
+
+    Остатки не меняются. Если какой-то марки нет, ничего не меняется.
+    """
+    await check_admin_permissions(get_user)
+    marks = set(await db.scalars(select(Manufacturer.name)))
+    missing = sorted({p.manufacturer for p in products} - marks)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"message": "Category not found.", "names": missing},
+        )
+
+    counts = await bulk_upsert(
+        db,
+        Catalog.__table__,
+        "model",
+        [product.model_dump() for product in products],
+        settings.import_batch_size,
+    )
+    await db.commit()
+    if counts["inserted"] or counts["updated"]:
+        # Модель могла сменить марку, поэтому сбрасываются страницы всех марок
+        await page_cache.invalidate(
+            ("all_models",),
+            ("in_stock",),
+            *(("mark_models", mark) for mark in marks),
+            *(("mark_in_stock", mark) for mark in marks),
+        )
+    return {"status_code": status.HTTP_200_OK, **counts}
@@ -1,40 +1,70 @@
-from typing import Annotated
+import time
+from typing import Annotated, Literal
 
+from app.backend.cache import page_cache, page_key
 from app.backend.db_depends import get_db
-from app.models import Items
+from app.backend.templates import stream_template
+from app.models import Catalog, Items
 from app.schemas import CreateItem, ItemDB
 from app.utils import (
+    ImportFormat,
+    ItemFilters,
+    PageParams,
+    StreamedPage,
     check_admin_permissions,
     ensure_exists,
     get_product_by_model,
+    item_facets,
+    iter_records,
+    select_rows,
 )
 from fastapi import APIRouter, Depends, status
 from fastapi.requests import Request
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from sqlalchemy import delete, insert, select, update
+from fastapi.responses import HTMLResponse
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..config import settings
 from .auth import get_current_user
 
 router = APIRouter(prefix="/items", tags=["items"])
 
-templates = Jinja2Templates(directory="templates")
-templates.env.globals["is_authenticated"] = (
-    lambda request: hasattr(request.state, "user")
-    and request.state.user is not None
-)
+ItemSort = Literal["id", "price", "cc", "horsepower"]
 
-router.mount("/static", StaticFiles(directory="static"), name="items")
+ITEM_COLUMNS = ["model", "cc", "horsepower", "age", "price", "row"]
+# Колонки, которые выводит список мотоциклов
+ITEM_LIST_COLUMNS = ("id", *ITEM_COLUMNS, "thumbnail")
 
 
 @router.get("/", response_model=list[ItemDB])
 async def get_all_items(
-    request: Request, db: Annotated[AsyncSession, Depends(get_db)]
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    page_params: Annotated[PageParams, Depends()],
+    filters: Annotated[ItemFilters, Depends()],
+    sort: ItemSort = "id",
 ):
-    items = await db.scalars(select(Items))
-    return templates.TemplateResponse(
-        "items.html", {"request": request, "items": items, "model": False}
+    key = page_key(request, "items")
+    cached = await page_cache.get(key)
+    if cached is not None:
+        return HTMLResponse(cached)
+
+    base = select_rows(Items, *ITEM_LIST_COLUMNS)
+    stmt = filters.apply(base)
+    facets = await item_facets(db, base, filters)
+    page = StreamedPage(stmt, page_params, getattr(Items, sort), Items.id)
+    return await stream_template(
+        "items.html",
+        {
+            "request": request,
+            "items": page.items,
+            "page": page,
+            "model": False,
+            "facets": facets,
+            "filtered": filters.active,
+        },
+        cache_key=key,
     )
 
 
@@ -43,13 +73,27 @@ async def get_model_items(
     request: Request,
     db: Annotated[AsyncSession, Depends(get_db)],
     model: str,
+    page_params: Annotated[PageParams, Depends()],
+    filters: Annotated[ItemFilters, Depends()],
+    sort: ItemSort = "id",
 ):
     model_ = await get_product_by_model(db, model)
     await ensure_exists(model_, "Model")
 
-    items = await db.scalars(select(Items).where(Items.model == model))
-    return templates.TemplateResponse(
-        "items.html", {"request": request, "items": items, "model": model}
+    base = select_rows(Items, *ITEM_LIST_COLUMNS).where(Items.model == model)
+    stmt = filters.apply(base)
+    facets = await item_facets(db, base, filters)
+    page = StreamedPage(stmt, page_params, getattr(Items, sort), Items.id)
+    return await stream_template(
+        "items.html",
+        {
+            "request": request,
+            "items": page.items,
+            "page": page,
+            "model": model,
+            "facets": facets,
+            "filtered": filters.active,
+        },
     )
 
 
@@ -76,6 +120,7 @@ async def create_item(
 
     await db.execute(insert(Items).values(**create_item.model_dump()))
     await db.commit()
+    await page_cache.invalidate(("items",))
     return {
         "status_code": status.HTTP_201_CREATED,
         "transaction": "Successful",
@@ -94,9 +139,17 @@ async def update_item(
     await ensure_exists(item, "Motorbike")
 
     await db.execute(
-        update(Items).where(Items.id == id).values(**update_item.model_dump())
+        update(Items)
+        .where(Items.id == id)
+        # Фото могло смениться: индексатор построит миниатюры первыми
+        .values(
+            **update_item.model_dump(),
+            thumbnail=None,
+            thumbnail_checked_at=None,
+        )
     )
     await db.commit()
+    await page_cache.invalidate(("items",))
     return {
         "status_code": status.HTTP_200_OK,
         "transaction": "Item update is successful",
@@ -118,7 +171,111 @@ async def delete_item(
         delete(Items).where(Items.id == id).values(**update_item.model_dump())
     )
     await db.commit()
+    await page_cache.invalidate(("items",))
     return {
         "status_code": status.HTTP_200_OK,
         "transaction": "Item delete is successful",
     }
+
+
+@router.post("/import")
+async def import_items(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    get_user: Annotated[dict, Depends(get_current_user)],
+    format: ImportFormat = "csv",
+):
+    """
+    Массовая загрузка мотоциклов из CSV (с заголовком) или NDJSON.
+
+    Тело читается потоком и проверяется пачками через CreateItem. Пачка
+    загружается командой COPY во временную таблицу, откуда переносится
+    в items, пропуская уже существующие row. Некорректные строки не
+    прерывают загрузку, а попадают в список ошибок.
+    """
+    await check_admin_permissions(get_user)
+    started = time.perf_counter()
+    models = set(await db.scalars(select(Catalog.model)))
+
+    await db.execute(
+        text(
+            "CREATE TEMP TABLE items_import ("
+            "model varchar, cc integer, horsepower integer, "
+            'age varchar, price double precision, "row" varchar'
+            ") ON COMMIT DROP"
+        )
+    )
+    connection = await (await db.connection()).get_raw_connection()
+    copy = connection.driver_connection.copy_records_to_table
+
+    inserted = 0
+    failed = 0
+    errors = []
+    seen = set()
+
+    def reject(line: int, error: str) -> None:
+        nonlocal failed
+        failed += 1
+        if len(errors) < settings.import_max_errors:
+            errors.append({"line": line, "error": error})
+
+    async for batch in iter_records(
+        request, format, settings.import_batch_size
+    ):
+        lines = {}
+        records = []
+        for line, record in batch:
+            if isinstance(record, Exception):
+                reject(line, f"Invalid JSON: {record}")
+                continue
+            try:
+                item = CreateItem.model_validate(record)
+            except ValidationError as exc:
+                reject(
+                    line,
+                    "; ".join(
+                        f"{'.'.join(map(str, e['loc']))}: {e['msg']}"
+                        for e in exc.errors()
+                    ),
+                )
+                continue
+            if item.model not in models:
+                reject(line, f"Model {item.model} not found.")
+                continue
+            if item.row in seen:
+                reject(line, f"Duplicate row {item.row}.")
+                continue
+            seen.add(item.row)
+            lines[item.row] = line
+            records.append(tuple(getattr(item, c) for c in ITEM_COLUMNS))
+
+        if not records:
+            continue
+        await copy("items_import", records=records, columns=ITEM_COLUMNS)
+        result = await db.scalars(
+            text(
+                'INSERT INTO items (model, cc, horsepower, age, price, "row") '
+                'SELECT model, cc, horsepower, age, price, "row" '
+                'FROM items_import ON CONFLICT ("row") DO NOTHING '
+                'RETURNING "row"'
+            )
+        )
+        added = set(result)
+        inserted += len(added)
+        for row in lines.keys() - added:
+            reject(lines[row], f"Row {row} already exists.")
+        await db.execute(text("TRUNCATE items_import"))
+
+    await db.commit()
+    if inserted:
+        await page_cache.invalidate(("items",))
+    errors.sort(key=lambda error: error["line"])
+    elapsed = time.perf_counter() - started
+    return {
+        "status_code": status.HTTP_201_CREATED,
+        "inserted": inserted,
+        "failed": failed,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round((inserted + failed) / elapsed),
+    }
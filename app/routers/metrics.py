@@ -0,0 +1,93 @@
+from app.backend.config import async_engine
+from app.backend.hashing import password_hasher
+from app.backend.lifespan import in_flight
+from app.backend.metrics import (
+    exporter,
+    histogram_family,
+    metrics,
+    value_family,
+)
+from app.backend.pool import pool_metrics
+from app.backend.telegram import outbox
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+router = APIRouter(tags=["metrics"])
+
+
+@metrics.collector
+def collect_components() -> list[dict]:
+    """Значения компонентов, которые уже считают сами себя."""
+    pool = async_engine.pool
+    return [
+        value_family(
+            "http_requests_in_flight",
+            "gauge",
+            "Requests being handled, streamed bodies included",
+            in_flight.count,
+        ),
+        histogram_family(
+            "db_pool_checkout_seconds",
+            "Time spent waiting for a pooled connection",
+            (),
+            pool_metrics.buckets,
+            [[[], [*pool_metrics.counts, pool_metrics.wait_seconds]]],
+        ),
+        value_family(
+            "db_pool_checked_out",
+            "gauge",
+            "Connections checked out of the pool",
+            pool.checkedout(),
+        ),
+        value_family(
+            "db_pool_timeouts_total",
+            "counter",
+            "Pool checkouts that timed out",
+            pool_metrics.timeouts,
+        ),
+        value_family(
+            "db_pool_connect_errors_total",
+            "counter",
+            "Failed database connection attempts",
+            pool_metrics.connect_errors,
+        ),
+        value_family(
+            "bcrypt_queue_depth",
+            "gauge",
+            "Password hashing jobs waiting for a thread",
+            password_hasher.queued,
+        ),
+        value_family(
+            "bcrypt_rejected_total",
+            "counter",
+            "Password hashing jobs rejected with 503",
+            password_hasher.rejected,
+        ),
+        value_family(
+            "telegram_outbox_queued",
+            "gauge",
+            "Telegram messages waiting to be sent",
+            outbox.queue.qsize(),
+        ),
+        value_family(
+            "telegram_sent_total",
+            "counter",
+            "Telegram messages delivered",
+            outbox.sent,
+        ),
+        value_family(
+            "telegram_dropped_total",
+            "counter",
+            "Telegram messages dropped after retries",
+            outbox.dropped,
+        ),
+    ]
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Метрики в текстовом формате Prometheus."""
+    return PlainTextResponse(
+        await exporter.export(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
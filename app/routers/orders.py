@@ -1,53 +1,60 @@
-import os
 from typing import Annotated
 
 from app.backend.db_depends import get_db
-from app.models import Orders, Users
+from app.backend.photos import list_photos, order_photos, save_photos
+from app.backend.sqlstats import query_budget
+from app.backend.templates import templates
+from app.models import Orders
 from app.schemas import OrderDB
+from app.utils import ensure_exists
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.requests import Request
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .auth import get_current_user
+from .user import user_tg_id
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
 
-templates = Jinja2Templates(directory="templates")
-templates.env.globals["is_authenticated"] = (
-    lambda request: hasattr(request.state, "user")
-    and request.state.user is not None
-)
-
-router.mount("/static", StaticFiles(directory="static"), name="static")
-
-
 @router.get("/{id}", response_model=OrderDB)
+@query_budget(2)
 async def order_detail(
     request: Request,
     db: Annotated[AsyncSession, Depends(get_db)],
     get_user: Annotated[dict, Depends(get_current_user)],
     id: int,
 ):
-    user_id = get_user.get("id")
-    user = await db.scalar(select(Users.tg_id).where(Users.id == user_id))
-    order = await db.scalar(select(Orders).where(Orders.id == id))
-    if user != order.tg_id:
+    row = (
+        await db.execute(
+            select(Orders, Orders.tg_id == user_tg_id(get_user)).where(
+                Orders.id == id
+            )
+        )
+    ).first()
+    await ensure_exists(row, "Order")
+    order, is_owner = row
+    if not is_owner:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="This is not your order!",
         )
-    photos = []
-    for file in os.listdir(order.order_archive):
-        photo = os.path.join(
-            "/static/orders/", os.path.basename(order.order_archive), file
-        )
-        photos.append(photo)
+    photos = order.photos
+    if photos is None and order.order_archive:
+        # Индексатор ещё не дошёл до заказа
+        photos = await list_photos(order.order_archive)
+        if photos is not None:
+            await save_photos(db, order.id, photos)
+            await db.commit()
 
     return templates.TemplateResponse(
         "order_card.html",
-        {"request": request, "order": order, "photos": photos},
+        {
+            "request": request,
+            "order": order,
+            "photos": order_photos(
+                order.order_archive, photos or [], order.thumbnails or {}
+            ),
+        },
     )
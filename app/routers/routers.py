@@ -1,9 +1,11 @@
 from fastapi import APIRouter
 
 from .admins import router as admins_router
+from .api import router as api_router
 from .auth import router as auth_router
 from .catalog import router as catalog_router
 from .items import router as items_router
+from .metrics import router as metrics_router
 from .orders import router as orders_router
 from .user import router as user_router
 
@@ -16,3 +18,5 @@ main_router.include_router(user_router)
 main_router.include_router(auth_router)
 main_router.include_router(admins_router)
 main_router.include_router(orders_router)
+main_router.include_router(api_router)
+main_router.include_router(metrics_router)
@@ -1,13 +1,13 @@
 from typing import Annotated
 
 from app.backend.db_depends import get_db
+from app.backend.sqlstats import query_budget
+from app.backend.templates import StreamedRows, stream_template, templates
 from app.models import Orders, Payment, Users
 from app.schemas import OrderDB, PaymentDB, User
-from app.utils import sqlalchemy_to_dict
+from app.utils import select_rows, sqlalchemy_to_dict
 from fastapi import APIRouter, Depends
 from fastapi.requests import Request
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -15,17 +15,20 @@ from .auth import get_current_user
 
 router = APIRouter(prefix="/user", tags=["user"])
 
+# Колонки, которые выводят списки заказов и платежей
+ORDER_COLUMNS = ("id", "timestamp", "model", "quantity", "purchase")
+PAYMENT_COLUMNS = ("id", "timestamp", "amount", "uuid")
 
-templates = Jinja2Templates(directory="templates")
-templates.env.globals["is_authenticated"] = (
-    lambda request: hasattr(request.state, "user")
-    and request.state.user is not None
-)
 
-router.mount("/static", StaticFiles(directory="static"), name="static")
+def user_tg_id(user: dict):
+    """tg_id пользователя подзапросом, чтобы не ходить в базу отдельно."""
+    return (
+        select(Users.tg_id).where(Users.id == user.get("id")).scalar_subquery()
+    )
 
 
 @router.get("/profile", response_model=User)
+@query_budget(1)
 async def user_profile(
     request: Request,
     db: Annotated[AsyncSession, Depends(get_db)],
@@ -44,33 +47,33 @@ async def user_profile(
 
 
 @router.get("/my_orders", response_model=list[OrderDB])
+@query_budget(1)
 async def my_orders(
     request: Request,
-    db: Annotated[AsyncSession, Depends(get_db)],
     get_user: Annotated[dict, Depends(get_current_user)],
 ):
-    id = get_user.get("id")
-    user = await db.scalar(select(Users.tg_id).where(Users.id == id))
-    orders = await db.scalars(
-        select(Orders).where(Orders.tg_id == user, Orders.is_paid == True)
+    orders = StreamedRows(
+        select_rows(Orders, *ORDER_COLUMNS).where(
+            Orders.tg_id == user_tg_id(get_user), Orders.is_paid == True
+        )
     )
 
-    return templates.TemplateResponse(
+    return await stream_template(
         "orders.html", {"request": request, "orders": orders}
     )
 
 
 @router.get("/my_payments", response_model=list[PaymentDB])
+@query_budget(1)
 async def my_payments(
     request: Request,
-    db: Annotated[AsyncSession, Depends(get_db)],
     get_user: Annotated[dict, Depends(get_current_user)],
 ):
-    id = get_user.get("id")
-    user = await db.scalar(select(Users.tg_id).where(Users.id == id))
-    payments = await db.scalars(
-        select(Payment).where(Payment.tg_id == user, Payment.confirmed == True)
+    payments = StreamedRows(
+        select_rows(Payment, *PAYMENT_COLUMNS).where(
+            Payment.tg_id == user_tg_id(get_user), Payment.confirmed == True
+        )
     )
-    return templates.TemplateResponse(
+    return await stream_template(
         "payments.html", {"request": request, "payments": payments}
     )
@@ -7,4 +7,4 @@ from .catalog import (  # noqa: F401
 from .items import CreateItem, ItemDB  # noqa: F401
 from .orders import OrderDB  # noqa: F401
 from .payments import PaymentDB  # noqa: F401
-from .users import CreateUser, User  # noqa: F401
+from .users import BalanceDelta, CreateUser, User  # noqa: F401
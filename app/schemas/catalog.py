@@ -29,6 +29,7 @@ class CreateModel(ModelBase):
 
 class ModelDB(ModelBase):
     id: int
+    quantity: int = 0
 
     class Config:
         orm_mode = True
@@ -24,3 +24,8 @@ class User(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class BalanceDelta(BaseModel):
+    username: str
+    amount: float
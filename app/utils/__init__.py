@@ -1,8 +1,19 @@
+from .bulk import ImportFormat, bulk_upsert, iter_records  # noqa: F401
+from .fields import parse_fields, rows_to_dicts, select_fields  # noqa: F401
+from .filters import ItemFilters, item_facets  # noqa: F401
+from .pagination import (  # noqa: F401
+    Page,
+    PageParams,
+    StreamedPage,
+    paginate,
+    paginate_rows,
+)
+from .rows import model_columns, row_type, select_rows  # noqa: F401
+from .search import search_catalog, search_query  # noqa: F401
 from .utils import (  # noqa: F401
     check_admin_permissions,
     ensure_exists,
     get_category_by_name,
     get_product_by_model,
-    remove_code_after_timeout,
     sqlalchemy_to_dict,
 )
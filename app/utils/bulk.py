@@ -0,0 +1,163 @@
+import codecs
+import csv
+import json
+from collections import deque
+from typing import AsyncIterator, Literal
+
+from fastapi.requests import Request
+from sqlalchemy import Boolean, Table, literal_column, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+ImportFormat = Literal["csv", "ndjson"]
+
+
+async def iter_lines(request: Request) -> AsyncIterator[list[str]]:
+    """Строки тела запроса с переводом строки, пачками по мере получения."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    async for chunk in request.stream():
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        tail = lines.pop()
+        if lines:
+            yield [line + "\n" for line in lines]
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield [tail]
+
+
+class LineBuffer:
+    """
+    Источник строк для csv.reader, который пополняется по мере чтения.
+
+    Пустой буфер завершает итерацию, но после пополнения читать можно
+    снова, поэтому один reader проходит всё тело запроса.
+    """
+
+    def __init__(self):
+        self.lines: deque[str] = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def iter_csv(
+    request: Request,
+) -> AsyncIterator[list[tuple[int, list[str]]]]:
+    """
+    Записи CSV пачками (номер первой строки записи, поля).
+
+    Поле в кавычках может содержать перевод строки и попасть на границу
+    кусков тела. Запись отдаётся reader, только когда кавычек в ней
+    чётное число, то есть последняя строка записи уже получена.
+    """
+    buffer = LineBuffer()
+    reader = csv.reader(buffer)
+    quotes = 0
+    async for lines in iter_lines(request):
+        rows = []
+        for line in lines:
+            buffer.lines.append(line)
+            quotes += line.count('"')
+            if quotes % 2 == 0:
+                quotes = 0
+                number = reader.line_num + 1
+                rows.append((number, next(reader)))
+        if rows:
+            yield rows
+    # Незакрытая кавычка: остаток тела — последняя запись
+    if buffer.lines:
+        yield [(reader.line_num + 1, next(reader))]
+
+
+async def iter_ndjson(request: Request) -> AsyncIterator[list[tuple[int, str]]]:
+    """Строки NDJSON пачками (номер строки, строка без пробелов по краям)."""
+    number = 0
+    async for lines in iter_lines(request):
+        rows = []
+        for line in lines:
+            number += 1
+            rows.append((number, line.strip()))
+        yield rows
+
+
+async def iter_records(
+    request: Request, format: ImportFormat, batch_size: int
+) -> AsyncIterator[list[tuple[int, object]]]:
+    """
+    Записи из загружаемого CSV (с заголовком) или NDJSON.
+
+    Возвращает пачки (номер строки, запись). Вместо записи, которую не
+    удалось разобрать, в пачке лежит исключение.
+    """
+    header = None
+    batch = []
+    if format == "csv":
+        chunks = iter_csv(request)
+    else:
+        chunks = iter_ndjson(request)
+    async for rows in chunks:
+        for number, row in rows:
+            if not row:
+                continue
+            if format == "csv":
+                if header is None:
+                    header = [name.strip() for name in row]
+                    continue
+                record = dict(zip(header, row))
+            else:
+                try:
+                    record = json.loads(row)
+                except ValueError as exc:
+                    record = exc
+            batch.append((number, record))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+async def bulk_upsert(
+    db: AsyncSession,
+    table: Table,
+    key: str,
+    rows: list[dict],
+    batch_size: int,
+) -> dict[str, int]:
+    """
+    INSERT ... ON CONFLICT (key) DO UPDATE пачками VALUES.
+
+    Строка обновляется, только если значения действительно отличаются,
+    поэтому неизменённые строки не попадают в RETURNING; вставленные
+    отличаются по xmax = 0. Повторы ключа во входных данных схлопываются,
+    побеждает последний: одна команда не может изменить строку дважды.
+    """
+    rows = list({row[key]: row for row in rows}.values())
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    if not rows:
+        return counts
+
+    columns = [name for name in rows[0] if name != key]
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start : start + batch_size]
+        stmt = insert(table).values(batch)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[key],
+            set_={name: stmt.excluded[name] for name in columns},
+            where=tuple_(*(table.c[name] for name in columns))
+            .is_distinct_from(
+                tuple_(*(stmt.excluded[name] for name in columns))
+            ),
+        ).returning(literal_column("xmax = 0", Boolean))
+        changed = (await db.scalars(stmt)).all()
+        inserted = sum(changed)
+        counts["inserted"] += inserted
+        counts["updated"] += len(changed) - inserted
+        counts["unchanged"] += len(batch) - len(changed)
+    return counts
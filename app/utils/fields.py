@@ -0,0 +1,42 @@
+from typing import Optional
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import Select, Table, select
+
+
+def parse_fields(fields: Optional[str], schema: type[BaseModel]) -> list[str]:
+    """
+    Поля из ?fields=a,b в порядке схемы ответа.
+
+    Без параметра возвращаются все поля схемы, неизвестное поле — 400.
+    """
+    allowed = list(schema.model_fields)
+    if not fields:
+        return allowed
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(requested - set(allowed))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Unknown fields.", "fields": unknown},
+        )
+    return [name for name in allowed if name in requested]
+
+
+def select_fields(table: Table, names: list[str], *required) -> Select:
+    """
+    SELECT только нужных колонок, без загрузки ORM-объектов.
+
+    Запрошенные колонки идут первыми, за ними — недостающие required
+    (колонки сортировки и id, по которым строятся курсоры).
+    """
+    columns = {name: table.c[name] for name in names}
+    for column in required:
+        columns.setdefault(column.key, table.c[column.key])
+    return select(*columns.values())
+
+
+def rows_to_dicts(rows: list, names: list[str]) -> list[dict]:
+    # Служебные колонки стоят в конце строки и отбрасываются zip
+    return [dict(zip(names, row)) for row in rows]
@@ -0,0 +1,111 @@
+from typing import Iterable, Optional
+
+from fastapi import Query
+from sqlalchemy import Select, and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Items
+
+# Границы интервалов для подсчёта фасетов: [граница, следующая граница)
+FACETS = {
+    "cc": (Items.cc, (0, 125, 250, 500, 750, 1000)),
+    "horsepower": (Items.horsepower, (0, 25, 50, 100, 150)),
+    "price": (Items.price, (0, 1000, 2500, 5000, 10000)),
+}
+
+
+class ItemFilters:
+    """
+    Фильтры мотоциклов по диапазонам.
+
+    Нижняя граница включается, верхняя — нет, как в интервалах фасетов.
+    Год выпуска хранится строкой, поэтому сравнивается как строка.
+    """
+
+    def __init__(
+        self,
+        cc_min: Optional[int] = Query(None, ge=0),
+        cc_max: Optional[int] = Query(None, ge=0),
+        horsepower_min: Optional[int] = Query(None, ge=0),
+        horsepower_max: Optional[int] = Query(None, ge=0),
+        price_min: Optional[float] = Query(None, ge=0),
+        price_max: Optional[float] = Query(None, ge=0),
+        age_min: Optional[str] = Query(None, max_length=4),
+        age_max: Optional[str] = Query(None, max_length=4),
+    ):
+        self.ranges = {
+            "cc": (cc_min, cc_max),
+            "horsepower": (horsepower_min, horsepower_max),
+            "price": (price_min, price_max),
+            "age": (age_min, age_max),
+        }
+
+    @property
+    def active(self) -> bool:
+        return any(
+            value is not None
+            for bounds in self.ranges.values()
+            for value in bounds
+        )
+
+    def conditions(self, names: Optional[Iterable[str]] = None) -> list:
+        """Условия диапазонов по столбцам names, по умолчанию по всем."""
+        names = self.ranges if names is None else names
+        conditions = []
+        for name in names:
+            low, high = self.ranges[name]
+            column = getattr(Items, name)
+            if low is not None:
+                conditions.append(column >= low)
+            if high is not None:
+                conditions.append(column < high)
+        return conditions
+
+    def apply(self, stmt: Select) -> Select:
+        """Добавить к запросу условия диапазонов."""
+        return stmt.where(*self.conditions())
+
+
+def facets_query(
+    stmt: Select, filters: ItemFilters
+) -> tuple[Select, list[tuple]]:
+    """
+    Один агрегат с count(*) FILTER на каждый интервал фасетов.
+
+    stmt — запрос списка без фильтров диапазонов. Интервалы фасета
+    считаются с фильтрами остальных столбцов, но без его собственного:
+    при выбранном объёме видно, сколько мотоциклов в соседних
+    интервалах объёма. Возвращает запрос и список (фасет, от, до) в
+    порядке его колонок.
+    """
+    buckets = []
+    columns = []
+    for name, (column, bounds) in FACETS.items():
+        others = filters.conditions(other for other in FACETS if other != name)
+        for i, low in enumerate(bounds):
+            high = bounds[i + 1] if i + 1 < len(bounds) else None
+            condition = column >= low
+            if high is not None:
+                condition = and_(condition, column < high)
+            buckets.append((name, low, high))
+            columns.append(func.count().filter(and_(condition, *others)))
+
+    query = select(*columns).select_from(Items)
+    if stmt.whereclause is not None:
+        query = query.where(stmt.whereclause)
+    # Фильтры столбцов без фасетов (год) действуют на все интервалы
+    unfaceted = [name for name in filters.ranges if name not in FACETS]
+    return query.where(*filters.conditions(unfaceted)), buckets
+
+
+async def item_facets(
+    db: AsyncSession, stmt: Select, filters: ItemFilters
+) -> dict[str, list]:
+    """Число мотоциклов в каждом интервале фасетов одним запросом."""
+    query, buckets = facets_query(stmt, filters)
+    counts = (await db.execute(query)).one()
+
+    facets = {name: [] for name in FACETS}
+    for (name, low, high), count in zip(buckets, counts):
+        facets[name].append({"min": low, "max": high, "count": count})
+    return facets
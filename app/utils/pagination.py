@@ -0,0 +1,248 @@
+import base64
+import binascii
+import json
+from typing import Any, AsyncIterator, Optional
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from ..backend.config import read_session
+from ..config import settings
+from .rows import row_type
+
+
+class PageParams:
+    """Параметры страницы: курсор и размер."""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = Query(settings.page_size, ge=1, le=settings.max_page_size),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+
+
+class Page:
+    def __init__(
+        self,
+        items: list,
+        next_cursor: Optional[str] = None,
+        prev_cursor: Optional[str] = None,
+    ):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+
+def encode_cursor(direction: str, sort: str, values: list[Any]) -> str:
+    raw = json.dumps([direction, sort, values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple[str, list[Any]]:
+    """Разобрать курсор и проверить, что он выдан для той же сортировки."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        direction, cursor_sort, values = json.loads(
+            base64.urlsafe_b64decode(padded)
+        )
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor."
+        )
+    if direction not in ("next", "prev") or cursor_sort != sort:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor."
+        )
+    return direction, values
+
+
+def keyset_query(
+    stmt: Select,
+    params: PageParams,
+    sort_column: InstrumentedAttribute,
+    id_column: InstrumentedAttribute,
+) -> tuple[Select, str, list[InstrumentedAttribute]]:
+    """
+    Keyset-условие по паре (колонка сортировки, id).
+
+    Следующая страница выбирается условием (sort, id) > (последние
+    значения), предыдущая — обратным условием и обратным порядком,
+    поэтому время запроса не зависит от глубины страницы. Выбирается
+    на одну строку больше, чтобы узнать, есть ли следующая страница.
+    """
+    keys = [sort_column, id_column]
+    if sort_column is id_column:
+        keys = [id_column]
+
+    direction = "next"
+    if params.cursor:
+        direction, values = decode_cursor(params.cursor, sort_column.key)
+        if len(values) != len(keys):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor.",
+            )
+        if direction == "next":
+            stmt = stmt.where(tuple_(*keys) > tuple_(*values))
+        else:
+            stmt = stmt.where(tuple_(*keys) < tuple_(*values))
+
+    if direction == "next":
+        stmt = stmt.order_by(*keys)
+    else:
+        stmt = stmt.order_by(*(key.desc() for key in keys))
+    return stmt.limit(params.limit + 1), direction, keys
+
+
+def page_cursors(
+    page: "Page | StreamedPage",
+    params: PageParams,
+    direction: str,
+    keys: list[InstrumentedAttribute],
+    first: Any,
+    last: Any,
+    has_more: bool,
+) -> None:
+    """Проставить курсоры соседних страниц по первой и последней строке."""
+    if first is None:
+        return
+
+    def cursor_for(direction: str, row) -> str:
+        values = [getattr(row, key.key) for key in keys]
+        return encode_cursor(direction, keys[0].key, values)
+
+    if has_more or direction == "prev":
+        page.next_cursor = cursor_for("next", last)
+    if params.cursor and (has_more or direction == "next"):
+        page.prev_cursor = cursor_for("prev", first)
+
+
+def page_of(
+    rows: list,
+    params: PageParams,
+    direction: str,
+    keys: list[InstrumentedAttribute],
+) -> Page:
+    """Убрать лишнюю строку, восстановить порядок и проставить курсоры."""
+    has_more = len(rows) > params.limit
+    rows = rows[: params.limit]
+    if direction == "prev":
+        rows.reverse()
+
+    page = Page(rows)
+    if rows:
+        page_cursors(
+            page, params, direction, keys, rows[0], rows[-1], has_more
+        )
+    return page
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    params: PageParams,
+    sort_column: InstrumentedAttribute,
+    id_column: InstrumentedAttribute,
+) -> Page:
+    """Загрузить страницу целиком."""
+    stmt, direction, keys = keyset_query(stmt, params, sort_column, id_column)
+    rows = list((await db.scalars(stmt)).all())
+    return page_of(rows, params, direction, keys)
+
+
+async def paginate_rows(
+    db: AsyncSession,
+    stmt: Select,
+    params: PageParams,
+    sort_column: InstrumentedAttribute,
+    id_column: InstrumentedAttribute,
+) -> Page:
+    """
+    Загрузить страницу строк запроса по колонкам, без ORM-объектов.
+
+    Колонки сортировки и id должны входить в выборку: по ним строятся
+    курсоры.
+    """
+    stmt, direction, keys = keyset_query(stmt, params, sort_column, id_column)
+    rows = list((await db.execute(stmt)).all())
+    return page_of(rows, params, direction, keys)
+
+
+class StreamedPage:
+    """
+    Страница для потоковой отрисовки.
+
+    Строки читаются серверным курсором в собственной сессии при переборе
+    items; курсоры соседних страниц становятся известны после того, как
+    шаблон перебрал все строки. Запрос выбирает колонки (select_rows),
+    строки отдаются как row_type, без объектов ORM.
+    """
+
+    def __init__(
+        self,
+        stmt: Select,
+        params: PageParams,
+        sort_column: InstrumentedAttribute,
+        id_column: InstrumentedAttribute,
+    ):
+        self.params = params
+        self.stmt, self.direction, self.keys = keyset_query(
+            stmt, params, sort_column, id_column
+        )
+        self.next_cursor: Optional[str] = None
+        self.prev_cursor: Optional[str] = None
+        self.started = False
+
+    @property
+    def items(self) -> AsyncIterator:
+        return self._rows()
+
+    async def _rows(self) -> AsyncIterator:
+        first = last = None
+        count = 0
+        has_more = False
+        async with read_session() as session:
+            if self.direction == "prev":
+                # Строки идут в обратном порядке, их не больше limit + 1
+                result = await session.execute(self.stmt)
+                dto = row_type(tuple(result.keys()))
+                rows = [dto._make(row) for row in result]
+                has_more = len(rows) > self.params.limit
+                rows = rows[: self.params.limit]
+                rows.reverse()
+                for row in rows:
+                    if first is None:
+                        first = row
+                    last = row
+                    self.started = True
+                    yield row
+            else:
+                result = await session.stream(self.stmt)
+                dto = row_type(tuple(result.keys()))
+                try:
+                    async for row in result:
+                        row = dto._make(row)
+                        if count == self.params.limit:
+                            has_more = True
+                            break
+                        count += 1
+                        if first is None:
+                            first = row
+                        last = row
+                        self.started = True
+                        yield row
+                finally:
+                    await result.close()
+        page_cursors(
+            self,
+            self.params,
+            self.direction,
+            self.keys,
+            first,
+            last,
+            has_more,
+        )
@@ -0,0 +1,30 @@
+from collections import namedtuple
+from functools import lru_cache
+
+from sqlalchemy import Select, select
+from sqlalchemy.inspection import inspect
+
+
+@lru_cache(maxsize=None)
+def model_columns(model: type) -> tuple[str, ...]:
+    """Имена колонок модели; inspect() выполняется один раз на класс."""
+    return tuple(attr.key for attr in inspect(model).column_attrs)
+
+
+@lru_cache(maxsize=None)
+def row_type(names: tuple[str, ...]) -> type:
+    """Класс строки-DTO для набора колонок: namedtuple, без __dict__."""
+    return namedtuple("Row", names)
+
+
+def select_rows(model: type, *names: str) -> Select:
+    """
+    SELECT колонок модели вместо объектов ORM.
+
+    Без names выбираются все колонки. StreamedPage и StreamedRows отдают
+    строки такого запроса как row_type: объекты ORM не создаются и не
+    попадают в identity map сессии.
+    """
+    return select(
+        *(getattr(model, name) for name in names or model_columns(model))
+    )
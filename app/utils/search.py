@@ -0,0 +1,85 @@
+from fastapi import HTTPException, status
+from sqlalchemy import Select, and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Catalog
+from .pagination import Page, PageParams, decode_cursor, encode_cursor
+
+SEARCH_SORT = "relevance"
+
+
+def search_query(q: str, params: PageParams) -> tuple[Select, str]:
+    """
+    Поиск моделей по марке, названию и типу с учётом опечаток.
+
+    Условие search %> q отбирает кандидатов по триграммному GIN-индексу,
+    word_similarity ранжирует их. Страницы выбираются по ключу
+    (релевантность, id) так же, как в keyset_query.
+    """
+    score = func.word_similarity(q, Catalog.search)
+    stmt = select(Catalog, score.label("score")).where(
+        Catalog.search.op("%>")(q)
+    )
+
+    direction = "next"
+    if params.cursor:
+        direction, values = decode_cursor(params.cursor, SEARCH_SORT)
+        if len(values) != 2:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor.",
+            )
+        last_score, last_id = values
+        if direction == "next":
+            stmt = stmt.where(
+                or_(
+                    score < last_score,
+                    and_(score == last_score, Catalog.id > last_id),
+                )
+            )
+        else:
+            stmt = stmt.where(
+                or_(
+                    score > last_score,
+                    and_(score == last_score, Catalog.id < last_id),
+                )
+            )
+
+    if direction == "next":
+        stmt = stmt.order_by(score.desc(), Catalog.id)
+    else:
+        stmt = stmt.order_by(score, Catalog.id.desc())
+    return stmt.limit(params.limit + 1), direction
+
+
+async def search_catalog(
+    db: AsyncSession, q: str, params: PageParams, similarity: float
+) -> Page:
+    """Страница результатов поиска, от самых похожих к менее похожим."""
+    # Порог оператора %> действует до конца транзакции
+    await db.execute(
+        select(
+            func.set_config(
+                "pg_trgm.word_similarity_threshold", str(similarity), True
+            )
+        )
+    )
+    stmt, direction = search_query(q, params)
+    rows = (await db.execute(stmt)).all()
+    has_more = len(rows) > params.limit
+    rows = rows[: params.limit]
+    if direction == "prev":
+        rows.reverse()
+
+    page = Page([product for product, _ in rows])
+    if rows:
+
+        def cursor_for(direction: str, row) -> str:
+            product, score = row
+            return encode_cursor(direction, SEARCH_SORT, [score, product.id])
+
+        if has_more or direction == "prev":
+            page.next_cursor = cursor_for("next", rows[-1])
+        if params.cursor and (has_more or direction == "next"):
+            page.prev_cursor = cursor_for("prev", rows[0])
+    return page
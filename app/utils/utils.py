@@ -1,10 +1,9 @@
-import asyncio
-
 from app.models import Catalog, Manufacturer
 from fastapi import HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.inspection import inspect
+
+from .rows import model_columns
 
 
 async def get_category_by_name(db: AsyncSession, name: str) -> Manufacturer:
@@ -37,15 +36,5 @@ async def ensure_exists(entity, entity_name="Entity"):
         )
 
 
-async def remove_code_after_timeout(warehouse, username, timeout=300):
-    """
-    Удаляет код верификации через заданный таймаут.
-    """
-    await asyncio.sleep(timeout)
-    warehouse.pop(username, None)
-
-
 def sqlalchemy_to_dict(obj):
-    return {
-        c.key: getattr(obj, c.key) for c in inspect(obj).mapper.column_attrs
-    }
+    return {key: getattr(obj, key) for key in model_columns(type(obj))}
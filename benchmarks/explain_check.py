@@ -0,0 +1,209 @@
+"""
+Проверка планов горячих запросов: ни один не должен читать таблицу целиком.
+
+Скрипт создаёт схему explain_check в базе из настроек, заполняет её
+данными, выполняет EXPLAIN для запросов из обработчиков и откатывает
+транзакцию — в базе ничего не остаётся. Код возврата 1, если в плане
+хоть одного запроса есть Seq Scan.
+
+    python -m benchmarks.explain_check --scale 1
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import sys
+
+from sqlalchemy import Select, select, text
+
+from app.backend.config import Base, async_engine
+from app.config import settings
+from app.models import Catalog, Items, Manufacturer, Orders, Payment
+from app.utils.filters import ItemFilters, facets_query
+from app.utils.pagination import PageParams, encode_cursor, keyset_query
+from app.utils.search import SEARCH_SORT, search_query
+
+SEED = [
+    """
+    INSERT INTO manufacturer (name, country)
+    SELECT 'mark-' || g, 'JP' FROM generate_series(1, :marks) g
+    """,
+    """
+    INSERT INTO catalog (manufacturer, type, model, quantity)
+    SELECT 'mark-' || (g % :marks + 1), 'road', 'model-' || g,
+           CASE WHEN g % 10 = 0 THEN g % 7 + 1 ELSE 0 END
+    FROM generate_series(1, :models) g
+    """,
+    """
+    INSERT INTO items (model, cc, horsepower, age, price, row)
+    SELECT 'model-' || (g % :models + 1), 100 + g % 1000, g % 200, '2020',
+           g * 37 % 10000, 'row-' || g
+    FROM generate_series(1, :items) g
+    """,
+    """
+    INSERT INTO users (tg_id, username, balance)
+    SELECT g, 'user-' || g, 0 FROM generate_series(1, :users) g
+    """,
+    """
+    INSERT INTO orders (tg_id, model, quantity, is_paid)
+    SELECT g % :users + 1, 'model-' || (g % :models + 1), 1, g % 10 = 0
+    FROM generate_series(1, :orders) g
+    """,
+    """
+    INSERT INTO payment (tg_id, amount, confirmed)
+    SELECT g % :users + 1, 100, g % 10 = 0
+    FROM generate_series(1, :orders) g
+    """,
+    "ANALYZE",
+]
+
+
+def page(stmt: Select, params: PageParams, sort, id_column) -> Select:
+    return keyset_query(stmt, params, sort, id_column)[0]
+
+
+def filters(**bounds) -> ItemFilters:
+    """ItemFilters вне FastAPI: там значения по умолчанию — Query."""
+    params = inspect.signature(ItemFilters).parameters
+    return ItemFilters(**{**dict.fromkeys(params), **bounds})
+
+
+def hot_queries() -> dict[str, Select]:
+    """Запросы в том виде, в каком их строят обработчики."""
+    first = PageParams(limit=settings.page_size)
+    by_price = PageParams(
+        cursor=encode_cursor("next", "price", [5000.0, 100000]),
+        limit=settings.page_size,
+    )
+    return {
+        "my_orders, get_user_orders": select(Orders).where(
+            Orders.tg_id == 1042, Orders.is_paid == True
+        ),
+        "my_payments": select(Payment).where(
+            Payment.tg_id == 1042, Payment.confirmed == True
+        ),
+        "get_category_by_name": select(Manufacturer).where(
+            Manufacturer.name == "mark-7"
+        ),
+        "get_product_by_model": select(Catalog).where(
+            Catalog.model == "model-123"
+        ),
+        "product_by_mark": page(
+            select(Catalog).where(Catalog.manufacturer == "mark-7"),
+            first,
+            Catalog.id,
+            Catalog.id,
+        ),
+        "product_by_mark_in_stock": page(
+            select(Catalog).where(
+                Catalog.manufacturer == "mark-7", Catalog.quantity > 0
+            ),
+            first,
+            Catalog.id,
+            Catalog.id,
+        ),
+        "get_stock_models": page(
+            select(Catalog).where(Catalog.quantity > 0),
+            first,
+            Catalog.id,
+            Catalog.id,
+        ),
+        "get_model_items": page(
+            select(Items).where(Items.model == "model-123"),
+            first,
+            Items.id,
+            Items.id,
+        ),
+        "get_model_items sort=price, next page": page(
+            select(Items).where(Items.model == "model-123"),
+            by_price,
+            Items.price,
+            Items.id,
+        ),
+        "get_all_items cc=500..750 sort=price": page(
+            filters(cc_min=500, cc_max=750).apply(select(Items)),
+            first,
+            Items.price,
+            Items.id,
+        ),
+        "item_facets model": facets_query(
+            select(Items).where(Items.model == "model-123"), filters()
+        )[0],
+        # Фасет считается без своего фильтра, поэтому без модели
+        # интервалы объёма охватывают всю таблицу
+        "item_facets model cc=500..750": facets_query(
+            select(Items).where(Items.model == "model-123"),
+            filters(cc_min=500, cc_max=750),
+        )[0],
+        "search_models": search_query("modle-123", first)[0],
+        "search_models, next page": search_query(
+            "modle-123",
+            PageParams(
+                cursor=encode_cursor("next", SEARCH_SORT, [0.7, 123]),
+                limit=settings.page_size,
+            ),
+        )[0],
+    }
+
+
+def seq_scans(plan: dict):
+    if plan["Node Type"] == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from seq_scans(child)
+
+
+async def run(args) -> int:
+    sizes = {
+        "marks": 100 * args.scale,
+        "models": 20000 * args.scale,
+        "items": 200000 * args.scale,
+        "users": 20000 * args.scale,
+        "orders": 200000 * args.scale,
+    }
+    failed = 0
+    async with async_engine.connect() as conn:
+        transaction = await conn.begin()
+        await conn.execute(text("CREATE SCHEMA explain_check"))
+        # public остаётся в пути ради операторов pg_trgm
+        await conn.execute(
+            text("SET LOCAL search_path TO explain_check, public")
+        )
+        await conn.run_sync(Base.metadata.create_all)
+        for statement in SEED:
+            await conn.execute(
+                text(statement),
+                {k: v for k, v in sizes.items() if f":{k}" in statement},
+            )
+
+        for name, stmt in hot_queries().items():
+            sql = stmt.compile(
+                dialect=conn.dialect, compile_kwargs={"literal_binds": True}
+            )
+            plan = await conn.scalar(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            root = plan[0]["Plan"]
+            scans = sorted(set(seq_scans(root)))
+            if scans:
+                failed += 1
+            status = "SEQ SCAN " + ", ".join(scans) if scans else "ok"
+            print(
+                f"{name:40} {root['Node Type']:22} "
+                f"cost={root['Total Cost']:<10} {status}"
+            )
+
+        await transaction.rollback()
+    await async_engine.dispose()
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=int, default=1)
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
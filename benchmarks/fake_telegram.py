@@ -0,0 +1,119 @@
+"""
+Локальная замена Bot API Telegram для нагрузочных тестов.
+
+Отвечает на sendMessage так же, как настоящий API, и умеет имитировать
+задержку, ошибки сервера и ограничения частоты (429 с retry_after).
+
+    python -m benchmarks.fake_telegram --port 8081 --latency 50
+    TELEGRAM_API_URL=http://localhost:8081 uvicorn app.main:app
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict, deque
+
+from aiohttp import web
+
+
+class FakeTelegram:
+    def __init__(
+        self,
+        latency: float,
+        error_rate: float,
+        enforce_limits: bool,
+        global_rate: int = 30,
+        chat_interval: float = 1,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.enforce_limits = enforce_limits
+        self.global_rate = global_rate
+        self.chat_interval = chat_interval
+        self.recent: deque = deque()
+        self.chat_last: dict[int, float] = defaultdict(float)
+        self.message_id = 0
+        self.stats = {"ok": 0, "rate_limited": 0, "errors": 0}
+
+    def _limited(self, chat_id: int) -> bool:
+        now = time.monotonic()
+        while self.recent and now - self.recent[0] > 1:
+            self.recent.popleft()
+        if (
+            len(self.recent) >= self.global_rate
+            or now - self.chat_last[chat_id] < self.chat_interval
+        ):
+            return True
+        self.recent.append(now)
+        self.chat_last[chat_id] = now
+        return False
+
+    async def send_message(self, request: web.Request) -> web.Response:
+        data = await request.post()
+        if not data:
+            data = await request.json()
+        chat_id = int(data["chat_id"])
+        if self.latency:
+            await asyncio.sleep(self.latency / 1000)
+
+        if random.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return web.json_response(
+                {"ok": False, "error_code": 502, "description": "Bad Gateway"},
+                status=502,
+            )
+        if self.enforce_limits and self._limited(chat_id):
+            self.stats["rate_limited"] += 1
+            return web.json_response(
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": "Too Many Requests: retry after 1",
+                    "parameters": {"retry_after": 1},
+                },
+                status=429,
+            )
+
+        self.stats["ok"] += 1
+        self.message_id += 1
+        return web.json_response(
+            {
+                "ok": True,
+                "result": {
+                    "message_id": self.message_id,
+                    "date": int(time.time()),
+                    "chat": {"id": chat_id, "type": "private"},
+                    "text": data.get("text", ""),
+                },
+            }
+        )
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/sendMessage", self.send_message)
+        app.router.add_get("/stats", self.get_stats)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0, help="мс")
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument(
+        "--no-limits",
+        action="store_true",
+        help="не отвечать 429 при превышении лимитов Telegram",
+    )
+    args = parser.parse_args()
+    fake = FakeTelegram(args.latency, args.error_rate, not args.no_limits)
+    web.run_app(fake.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
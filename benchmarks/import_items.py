@@ -0,0 +1,63 @@
+"""
+Загрузка сгенерированной таблицы поставщика через /items/import.
+
+Строки генерируются на лету и отправляются потоком, модели берутся из
+--models (через запятую), токен администратора — из --token.
+
+    python -m benchmarks.import_items --rows 20000 --models CBR600,R1 \\
+        --token "$ADMIN_TOKEN"
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+import aiohttp
+
+HEADER = "model,cc,horsepower,age,price,row\n"
+
+
+async def generate(rows: int, models: list[str], chunk: int = 1000):
+    run = uuid.uuid4().hex[:8]
+    yield HEADER.encode()
+    for start in range(0, rows, chunk):
+        yield "".join(
+            f"{models[i % len(models)]},{600 + i % 600},{50 + i % 150},"
+            f"{2000 + i % 25},{1000 + i % 9000},{run}-{i}\n"
+            for i in range(start, min(start + chunk, rows))
+        ).encode()
+
+
+async def run(args) -> None:
+    models = args.models.split(",")
+    started = time.perf_counter()
+    async with aiohttp.ClientSession(
+        cookies={"users_access_token": args.token}
+    ) as session:
+        async with session.post(
+            f"{args.url}/items/import",
+            params={"format": "csv"},
+            data=generate(args.rows, models),
+            headers={"Content-Type": "text/csv"},
+        ) as response:
+            result = await response.json()
+    elapsed = time.perf_counter() - started
+    errors = result.pop("errors", [])
+    print(result)
+    print(f"{args.rows} rows in {elapsed:.2f}s end to end")
+    for error in errors[:10]:
+        print("  ", error)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--models", required=True)
+    parser.add_argument("--token", required=True)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
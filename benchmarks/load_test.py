@@ -0,0 +1,365 @@
+"""
+Нагрузочный тест HTTP на данных из benchmarks.seed_data.
+
+--concurrency виртуальных пользователей в течение --duration секунд
+выбирают сценарий по весам (каталог, мотоциклы, профиль, вход, админка)
+и выполняют его запросы по очереди, не дожидаясь пауз. Первые --warmup
+секунд в отчёт не попадают. Для каждого маршрута печатаются число
+запросов, ошибки, запросы в секунду и p50/p95/p99.
+
+Выбор сценариев и параметров задаёт --seed, поэтому прогоны на одном
+наборе данных сравнимы. --save сохраняет результат в JSON, --compare
+сравнивает с сохранённым и завершается с кодом 1, если p95 какого-то
+маршрута вырос больше чем на --tolerance.
+
+    python -m benchmarks.load_test --duration 60 --concurrency 50 \\
+        --save benchmarks/results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.load_test --compare benchmarks/results/abc1234.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Optional
+
+import aiohttp
+
+COOKIE = "users_access_token"
+
+# Сценарий -> вес; запросы сценария описаны в Flows
+WEIGHTS = {
+    "catalog": 40,
+    "items": 30,
+    "profile": 15,
+    "login": 5,
+    "admin": 10,
+}
+
+
+class Recorder:
+    """Задержки по маршрутам; маршрут — шаблон пути, а не сам путь."""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.recording = False
+
+    def add(self, route: str, seconds: float, ok: bool) -> None:
+        if not self.recording:
+            return
+        self.latencies[route].append(seconds)
+        if not ok:
+            self.errors[route] += 1
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Процентиль по ближайшему рангу из отсортированного списка."""
+    return values[max(math.ceil(q / 100 * len(values)), 1) - 1]
+
+
+class Flows:
+    """Сценарии пользователей и общие для них данные."""
+
+    def __init__(self, session, args, recorder, rng, marks, models, tokens):
+        self.session = session
+        self.url = args.url
+        self.args = args
+        self.recorder = recorder
+        self.rng = rng
+        self.marks = marks
+        self.models = models
+        self.tokens = tokens
+
+    async def request(
+        self,
+        route: str,
+        path: str,
+        method: str = "GET",
+        token: Optional[str] = None,
+        **kwargs,
+    ) -> int:
+        headers = {"Cookie": f"{COOKIE}={token}"} if token else {}
+        started = time.perf_counter()
+        try:
+            async with self.session.request(
+                method,
+                self.url + path,
+                headers=headers,
+                allow_redirects=False,
+                **kwargs,
+            ) as response:
+                await response.read()
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            status = 0
+        self.recorder.add(
+            f"{method} {route}",
+            time.perf_counter() - started,
+            0 < status < 400,
+        )
+        return status
+
+    async def catalog(self) -> None:
+        mark = self.rng.choice(self.marks)
+        await self.request("/catalog/", "/catalog/")
+        await self.request(
+            "/catalog/{mark}/models", f"/catalog/{mark}/models"
+        )
+        await self.request(
+            "/catalog/search",
+            "/catalog/search",
+            params={"q": self.rng.choice(self.models)[:-1]},
+        )
+
+    async def items(self) -> None:
+        model = self.rng.choice(self.models)
+        low = self.rng.randrange(500, 15000, 500)
+        await self.request("/items/", "/items/")
+        await self.request(
+            "/items/{model}", f"/items/{model}", params={"sort": "price"}
+        )
+        await self.request(
+            "/items/",
+            "/items/",
+            params={"price_min": low, "price_max": low + 2500},
+        )
+
+    async def profile(self) -> None:
+        token = self.rng.choice(self.tokens)
+        await self.request("/user/profile", "/user/profile", token=token)
+        await self.request("/user/my_orders", "/user/my_orders", token=token)
+        await self.request(
+            "/user/my_payments", "/user/my_payments", token=token
+        )
+
+    async def login(self) -> None:
+        await self.request(
+            "/auth/login/",
+            "/auth/login/",
+            method="POST",
+            data={
+                "username": self.user(),
+                "password": self.args.password,
+            },
+        )
+
+    async def admin(self) -> None:
+        token = self.tokens[0]
+        params = {"username": self.user()}
+        await self.request(
+            "/admin/get_user", "/admin/get_user", token=token, params=params
+        )
+        await self.request(
+            "/admin/user_orders",
+            "/admin/user_orders",
+            token=token,
+            params=params,
+        )
+        await self.request(
+            "/admin/pool_stats", "/admin/pool_stats", token=token
+        )
+
+    def user(self) -> str:
+        return f"bench-user-{self.rng.randint(1, self.args.users)}"
+
+
+async def login(session, args, username: str) -> str:
+    async with session.post(
+        f"{args.url}/auth/login/",
+        data={"username": username, "password": args.password},
+        allow_redirects=False,
+    ) as response:
+        cookie = response.cookies.get(COOKIE)
+        if cookie is None:
+            raise SystemExit(f"Login as {username} failed: {response.status}")
+        return cookie.value
+
+
+async def names(session, args, path: str, field: str) -> list[str]:
+    async with session.get(
+        f"{args.url}/api/v1/catalog/{path}",
+        params={"fields": field, "limit": 200},
+    ) as response:
+        response.raise_for_status()
+        rows = (await response.json())["items"]
+    if not rows:
+        raise SystemExit("Catalog is empty, run benchmarks.seed_data first")
+    return [row[field] for row in rows]
+
+
+async def user_loop(flows: Flows, deadline: float) -> None:
+    scenarios = list(WEIGHTS)
+    weights = list(WEIGHTS.values())
+    while time.perf_counter() < deadline:
+        scenario = flows.rng.choices(scenarios, weights)[0]
+        await getattr(flows, scenario)()
+
+
+def report(recorder: Recorder, seconds: float) -> dict:
+    routes = {}
+    for route in sorted(recorder.latencies):
+        values = sorted(recorder.latencies[route])
+        routes[route] = {
+            "requests": len(values),
+            "errors": recorder.errors[route],
+            "rps": round(len(values) / seconds, 2),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+        }
+    total = sum(route["requests"] for route in routes.values())
+    return {
+        "routes": routes,
+        "requests": total,
+        "errors": sum(route["errors"] for route in routes.values()),
+        "rps": round(total / seconds, 2),
+    }
+
+
+def print_report(result: dict) -> None:
+    print(
+        f"{'route':32} {'req':>7} {'err':>5} {'rps':>8} "
+        f"{'p50':>8} {'p95':>8} {'p99':>8}"
+    )
+    for route, r in result["routes"].items():
+        print(
+            f"{route:32} {r['requests']:>7} {r['errors']:>5} "
+            f"{r['rps']:>8.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+            f"{r['p99_ms']:>8.1f}"
+        )
+    print(
+        f"total: {result['requests']} requests, {result['errors']} errors, "
+        f"{result['rps']:.1f} req/s"
+    )
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> int:
+    """Сравнить p95 с базовым прогоном, вернуть число регрессий."""
+    print(f"\ncompared with {baseline.get('commit') or 'baseline'}:")
+    regressions = 0
+    for route, r in result["routes"].items():
+        before = baseline["routes"].get(route)
+        if before is None or not before["p95_ms"]:
+            continue
+        change = r["p95_ms"] / before["p95_ms"] - 1
+        flag = ""
+        if change > tolerance:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(
+            f"{route:32} p95 {before['p95_ms']:>8.1f} -> "
+            f"{r['p95_ms']:>8.1f} ms ({change:+.0%}){flag}"
+        )
+    change = result["rps"] / baseline["rps"] - 1 if baseline["rps"] else 0
+    print(f"{'throughput':32} {change:+.0%}")
+    return regressions
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> int:
+    rng = random.Random(args.seed)
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    # Куки передаются явно в каждом запросе, общая банка не нужна
+    async with aiohttp.ClientSession(
+        connector=connector,
+        timeout=timeout,
+        cookie_jar=aiohttp.DummyCookieJar(),
+    ) as session:
+        marks = await names(session, args, "marks", "name")
+        models = await names(session, args, "models", "model")
+        # Первый токен — администратора
+        tokens = [await login(session, args, "bench-admin")]
+        for i in range(1, min(args.sessions, args.users) + 1):
+            tokens.append(await login(session, args, f"bench-user-{i}"))
+
+        recorder = Recorder()
+        started = time.perf_counter()
+        deadline = started + args.warmup + args.duration
+        users = [
+            user_loop(
+                Flows(
+                    session,
+                    args,
+                    recorder,
+                    random.Random(rng.random()),
+                    marks,
+                    models,
+                    tokens,
+                ),
+                deadline,
+            )
+            for _ in range(args.concurrency)
+        ]
+        tasks = asyncio.gather(*users)
+        await asyncio.sleep(args.warmup)
+        recorder.recording = True
+        measured = time.perf_counter()
+        await tasks
+        seconds = time.perf_counter() - measured
+
+    result = {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "args": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("save", "compare")
+        },
+        **report(recorder, seconds),
+    }
+    print_report(result)
+
+    if args.save:
+        path = Path(args.save)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+        print(f"saved to {path}")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if compare(result, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--users", type=int, default=100, help="сколько bench-user-N в базе"
+    )
+    parser.add_argument(
+        "--sessions", type=int, default=20, help="заранее вошедших"
+    )
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--save", help="куда записать результат")
+    parser.add_argument("--compare", help="результат базового прогона")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
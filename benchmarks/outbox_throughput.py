@@ -0,0 +1,77 @@
+"""
+Пропускная способность очереди уведомлений на локальном фейковом Telegram.
+
+    python -m benchmarks.outbox_throughput --messages 600 --chats 300
+"""
+
+import argparse
+import asyncio
+import time
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+
+from app.backend.telegram import CircuitBreaker, TelegramOutbox
+from app.config import settings
+
+from .fake_telegram import FakeTelegram
+
+
+async def run(args) -> None:
+    fake = FakeTelegram(args.latency, args.error_rate, enforce_limits=True)
+    runner = web.AppRunner(fake.app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", args.port)
+    await site.start()
+
+    bot = Bot(
+        token=settings.token,
+        session=AiohttpSession(
+            api=TelegramAPIServer.from_base(f"http://127.0.0.1:{args.port}")
+        ),
+    )
+    outbox = TelegramOutbox(
+        bot,
+        maxsize=args.messages,
+        workers=args.workers,
+        global_rate=settings.telegram_global_rate,
+        chat_interval=settings.telegram_chat_interval,
+        max_attempts=settings.telegram_max_attempts,
+        breaker=CircuitBreaker(
+            settings.telegram_breaker_threshold,
+            settings.telegram_breaker_timeout,
+        ),
+    )
+    await outbox.start()
+
+    started = time.perf_counter()
+    for i in range(args.messages):
+        outbox.enqueue(i % args.chats + 1, f"Сообщение {i}")
+    await outbox.queue.join()
+    elapsed = time.perf_counter() - started
+
+    await outbox.stop()
+    await bot.session.close()
+    await runner.cleanup()
+
+    print(f"{args.messages} messages in {elapsed:.2f}s")
+    print(f"throughput: {args.messages / elapsed:.1f} msg/s")
+    print("outbox:", outbox.stats())
+    print("fake telegram:", fake.stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--chats", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=20, help="мс")
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--port", type=int, default=8082)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Проверка движка за PgBouncer в режиме transaction.
+
+Много параллельных транзакций выполняют разные параметризованные запросы
+и читают серверный курсор. Серверных соединений у PgBouncer меньше, чем
+клиентских, поэтому соседние транзакции одного соединения приложения
+попадают на разные соединения с базой. Без DB_PGBOUNCER=true здесь
+появляются ошибки вида "prepared statement ... does not exist".
+
+    docker compose -f benchmarks/pgbouncer/docker-compose.yml up -d
+    POSTGRES_HOST=localhost POSTGRES_PORT=6432 POSTGRES_USER=bench \\
+    POSTGRES_PASSWORD=bench POSTGRES_DB=bench DB_PGBOUNCER=true \\
+    python -m benchmarks.pgbouncer_check
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+
+from sqlalchemy import text
+
+from app.backend.config import async_engine
+from app.config import settings
+
+QUERIES = [text(f"SELECT CAST(:n AS integer) + {k}") for k in range(20)]
+CURSOR = text("SELECT generate_series(1, CAST(:n AS integer))")
+
+
+async def transaction(worker: int, iteration: int) -> None:
+    async with async_engine.begin() as conn:
+        for k in range(3):
+            query = QUERIES[(worker + iteration + k) % len(QUERIES)]
+            await conn.scalar(query, {"n": iteration})
+        result = await conn.stream_scalars(CURSOR, {"n": 50})
+        assert sum([n async for n in result]) == 1275
+
+
+async def worker(number: int, iterations: int, errors: Counter) -> None:
+    for iteration in range(iterations):
+        try:
+            await transaction(number, iteration)
+        except Exception as exc:
+            errors[type(exc).__name__ + ": " + str(exc).splitlines()[0]] += 1
+
+
+async def run(args) -> int:
+    errors: Counter = Counter()
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(worker(n, args.iterations, errors) for n in range(args.workers))
+    )
+    elapsed = time.perf_counter() - started
+    await async_engine.dispose()
+
+    total = args.workers * args.iterations
+    failed = sum(errors.values())
+    print(f"pgbouncer mode: {settings.db_pgbouncer}")
+    print(f"{total} transactions in {elapsed:.2f}s, {failed} failed")
+    for error, count in errors.most_common():
+        print(f"  {count:5d}  {error}")
+    return 1 if errors else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=40)
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
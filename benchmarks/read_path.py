@@ -0,0 +1,122 @@
+"""
+Сравнение чтения списков: объекты ORM против строк-DTO (select_rows).
+
+Скрипт заполняет схему read_path таблицей items на --rows строк и для
+каждого размера читает её двумя способами, обращаясь к тем же атрибутам,
+что и шаблон списка: время — лучшее из --repeat запусков, память — пик
+выделений Python по tracemalloc. Транзакция откатывается, в базе ничего
+не остаётся.
+
+    python -m benchmarks.read_path --rows 10000 100000
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.backend.config import DATABASE_URL, Base
+from app.models import Catalog, Items, Manufacturer
+from app.routers.items import ITEM_LIST_COLUMNS
+from app.utils.rows import row_type, select_rows
+
+SEED_BATCH = 10000
+
+
+def touch(rows) -> int:
+    """Прочитать атрибуты так же, как items.html."""
+    total = 0
+    for row in rows:
+        total += row.cc + row.horsepower + len(row.model) + len(row.row)
+        total += int(row.price) + len(row.age) + row.id
+    return total
+
+
+async def read_orm(conn, rows: int) -> int:
+    async with AsyncSession(bind=conn, expire_on_commit=False) as session:
+        items = (await session.scalars(select(Items).limit(rows))).all()
+        return touch(items)
+
+
+async def read_dto(conn, rows: int) -> int:
+    async with AsyncSession(bind=conn, autoflush=False) as session:
+        result = await session.execute(
+            select_rows(Items, *ITEM_LIST_COLUMNS).limit(rows)
+        )
+        dto = row_type(tuple(result.keys()))
+        return touch([dto._make(row) for row in result])
+
+
+async def seed(conn, rows: int) -> None:
+    await conn.execute(insert(Manufacturer).values(name="mark", country="JP"))
+    await conn.execute(
+        insert(Catalog).values(manufacturer="mark", model="model", type="road")
+    )
+    for start in range(0, rows, SEED_BATCH):
+        await conn.execute(
+            insert(Items),
+            [
+                {
+                    "model": "model",
+                    "cc": 100 + i % 1000,
+                    "horsepower": i % 200,
+                    "age": "2020",
+                    "price": float(i * 37 % 10000),
+                    "row": f"row-{i}",
+                }
+                for i in range(start, min(start + SEED_BATCH, rows))
+            ],
+        )
+
+
+async def measure(read, conn, rows: int, repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await read(conn, rows)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    await read(conn, rows)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+async def run(args) -> None:
+    engine = create_async_engine(args.url)
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text("CREATE SCHEMA read_path"))
+            await conn.execute(
+                text("SET LOCAL search_path TO read_path, public")
+            )
+        await conn.run_sync(Base.metadata.create_all)
+        await seed(conn, max(args.rows))
+
+        print(f"{'rows':>8} {'path':5} {'ms':>9} {'peak MiB':>9}")
+        for rows in args.rows:
+            for name, read in (("orm", read_orm), ("dto", read_dto)):
+                seconds, peak = await measure(read, conn, rows, args.repeat)
+                print(
+                    f"{rows:>8} {name:5} {seconds * 1000:>9.1f} "
+                    f"{peak / 2**20:>9.1f}"
+                )
+
+        await transaction.rollback()
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default=DATABASE_URL)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
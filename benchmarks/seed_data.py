@@ -0,0 +1,146 @@
+"""
+Синтетические данные для нагрузочного теста.
+
+Заполняет базу из настроек (или --url) марками, моделями, мотоциклами,
+пользователями, заказами и платежами. Объём задаёт --items (1000 …
+1000000), остальные таблицы считаются от него. Данные вычисляются из
+номера строки в generate_series, без случайных чисел, поэтому при
+одинаковых параметрах база получается одинаковой.
+
+Схему создают миграции (alembic upgrade head). Если в таблицах уже есть
+данные, скрипт останавливается; --reset очищает их перед заполнением.
+У всех пользователей один пароль (--password), администратор —
+bench-admin, пользователи — bench-user-1 … bench-user-N.
+
+    docker compose up -d db && alembic upgrade head
+    python -m benchmarks.seed_data --items 100000 --reset
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from passlib.context import CryptContext
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.backend.config import DATABASE_URL
+from app.models import Manufacturer
+
+# tg_id пользователей: bench-admin — TG_BASE, bench-user-g — TG_BASE + g
+TG_BASE = 7_000_000_000
+
+TABLES = "manufacturer, catalog, items, users, orders, payment"
+
+SEED = {
+    "manufacturer": """
+    INSERT INTO manufacturer (name, country)
+    SELECT 'mark-' || g, (ARRAY['JP', 'IT', 'DE', 'US', 'AT', 'GB'])[g % 6 + 1]
+    FROM generate_series(1, :marks) g
+    """,
+    "catalog": """
+    INSERT INTO catalog (manufacturer, type, model, quantity)
+    SELECT 'mark-' || (g % :marks + 1),
+           (ARRAY['road', 'sport', 'touring', 'cross', 'enduro'])[g % 5 + 1],
+           'model-' || g,
+           CASE WHEN g % 3 = 0 THEN 0 ELSE g % 20 END
+    FROM generate_series(1, :models) g
+    """,
+    "items": """
+    INSERT INTO items (model, cc, horsepower, age, price, row)
+    SELECT 'model-' || (g % :models + 1), 50 + g * 7919 % 1950,
+           5 + g * 104729 % 200, (1990 + g % 35)::text,
+           500 + g * 7907 % 20000, 'bench-' || g
+    FROM generate_series(1, :items) g
+    """,
+    "users": """
+    INSERT INTO users (tg_id, username, language, balance, is_admin,
+                       active, block_bot, hashed_password, reg_date)
+    SELECT CAST(:tg_base AS bigint) + g,
+           CASE WHEN g = 0 THEN 'bench-admin' ELSE 'bench-user-' || g END,
+           'en', g * 31 % 10000, g = 0, true, false, :password_hash,
+           now() - (g % 1000) * interval '1 day'
+    FROM generate_series(0, :users) g
+    """,
+    "orders": """
+    INSERT INTO orders (timestamp, tg_id, model, quantity, cc, horsepower,
+                        age, purchase, is_paid)
+    SELECT now() - g * interval '1 minute',
+           CAST(:tg_base AS bigint) + g % :users + 1,
+           'model-' || (g % :models + 1), 1 + g % 3, 50 + g * 7919 % 1950,
+           5 + g * 104729 % 200, (1990 + g % 35)::text,
+           500 + g * 7907 % 20000, g % 4 <> 0
+    FROM generate_series(1, :orders) g
+    """,
+    "payment": """
+    INSERT INTO payment (timestamp, tg_id, amount, uuid, confirmed)
+    SELECT now() - g * interval '1 minute',
+           CAST(:tg_base AS bigint) + g % :users + 1,
+           100 + g * 13 % 5000, md5(g::text), g % 5 <> 0
+    FROM generate_series(1, :payments) g
+    """,
+}
+
+
+def sizes(args) -> dict[str, int]:
+    users = args.users or max(args.items // 10, 100)
+    return {
+        "items": args.items,
+        "marks": args.marks,
+        "models": args.models or max(args.items // 100, 50),
+        "users": users,
+        "orders": users * args.orders_per_user,
+        "payments": users * args.payments_per_user,
+    }
+
+
+async def run(args) -> int:
+    params = {
+        **sizes(args),
+        "tg_base": TG_BASE,
+        # bcrypt медленный: один хеш на всех пользователей
+        "password_hash": CryptContext(schemes=["bcrypt"]).hash(args.password),
+    }
+    engine = create_async_engine(args.url)
+    async with engine.begin() as conn:
+        if args.reset:
+            await conn.execute(
+                text(f"TRUNCATE {TABLES} RESTART IDENTITY CASCADE")
+            )
+        elif await conn.scalar(select(func.count()).select_from(Manufacturer)):
+            print("Database is not empty, use --reset to replace its data")
+            await engine.dispose()
+            return 1
+
+        for table, statement in SEED.items():
+            started = time.perf_counter()
+            result = await conn.execute(
+                text(statement),
+                {k: v for k, v in params.items() if f":{k}" in statement},
+            )
+            print(
+                f"{table:14} {result.rowcount:>10} rows "
+                f"{time.perf_counter() - started:8.2f}s"
+            )
+        await conn.execute(text(f"ANALYZE {TABLES}"))
+    await engine.dispose()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default=DATABASE_URL)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--marks", type=int, default=50)
+    parser.add_argument("--models", type=int, help="по умолчанию items/100")
+    parser.add_argument("--users", type=int, help="по умолчанию items/10")
+    parser.add_argument("--orders-per-user", type=int, default=5)
+    parser.add_argument("--payments-per-user", type=int, default=3)
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--reset", action="store_true")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()